@@ -0,0 +1,175 @@
+import argparse
+import logging
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from app.utils.data_store import ParquetChunkWriter, to_columnar
+from app.utils.instrumentation import _max_rss_mib
+from app.utils.scoring import CandidateScorer
+from app.utils.ranking import TopKRanker
+
+ID_COLUMNS = ["vacancy_id", "candidate_id"]
+
+_pipeline = None
+
+
+def _init_worker(models_dir):
+    # Cada processo carrega o artefato uma única vez.
+    global _pipeline
+    _pipeline = CandidateScorer.load(models_dir)
+
+
+def _score_chunk(chunk):
+    scores = _pipeline.predict_proba(chunk)
+    scored = chunk.loc[scores.index, [col for col in ID_COLUMNS if col in chunk.columns]].copy()
+    scored.insert(0, "row", scores.index)
+    scored["approval_probability"] = scores.to_numpy()
+    if _pipeline.target_column in chunk.columns:
+        scored["approved"] = chunk.loc[scores.index, _pipeline.target_column].astype(int)
+    elif "prospect_candidate_status" in chunk.columns:
+        scored["approved"] = (chunk.loc[scores.index, "prospect_candidate_status"] == "Aprovado").astype(int)
+    return scored
+
+
+def iter_chunks(path, chunk_rows):
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            yield to_columnar(chunk)
+
+
+def iter_windowed_chunks(chunks, sequence_length):
+    # Prefixa cada bloco com as últimas sequence_length linhas do anterior, para que as
+    # janelas atravessem a fronteira e cada linha seja pontuada uma única vez. O índice
+    # é o número da linha no arquivo inteiro.
+    tail = None
+    offset = 0
+    for chunk in chunks:
+        start = offset
+        offset += len(chunk)
+        if tail is not None and len(tail):
+            start -= len(tail)
+            chunk = pd.concat([tail, chunk], ignore_index=True)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        # Blocos menores que sequence_length acumulam no prefixo até haver contexto suficiente.
+        tail = chunk.iloc[max(len(chunk) - sequence_length, 0):] if sequence_length else None
+        if len(chunk) > sequence_length:
+            yield chunk
+
+
+class ScoredWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = ParquetChunkWriter(path) if path.endswith(".parquet") else None
+        self.header = True
+
+    def write(self, df):
+        if self.parquet is not None:
+            self.parquet.write(df)
+        else:
+            df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.parquet is not None:
+            self.parquet.close()
+
+
+def _peak_rss_mib():
+    # Para os filhos ru_maxrss é o maior worker, não a soma. Sem o módulo resource (Windows)
+    # os dois picos ficam None.
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    unit = 1 if sys.platform == "darwin" else 1024
+    return _max_rss_mib(), resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 2**20
+
+
+class BatchScorer:
+    def __init__(self, models_dir="models", chunk_rows=100_000, workers=1, top_k=None):
+        self.models_dir = models_dir
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.top_k = top_k
+        self.ranker = None
+        self.n_rows = 0
+
+    def _iter_scored(self, chunks):
+        if not self.workers or self.workers <= 1:
+            _init_worker(self.models_dir)
+            for chunk in chunks:
+                yield _score_chunk(chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.models_dir,)) as executor:
+            # No máximo 2 blocos por worker em voo, para a memória não crescer com o arquivo.
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(_score_chunk, chunk))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _rank(self, scored):
+        if not self.top_k or not set(ID_COLUMNS).issubset(scored.columns):
+            return
+        vacancy_ids = scored["vacancy_id"].unique()
+        if self.ranker is None:
+            self.ranker = TopKRanker(vacancy_ids, k=self.top_k)
+        else:
+            self.ranker.add_vacancies(vacancy_ids)
+        self.ranker.push(scored["vacancy_id"], scored["candidate_id"], scored["approval_probability"])
+
+    def run(self, input_path, output_path, top_k_path=None):
+        sequence_length = CandidateScorer.load(self.models_dir).sequence_length
+        chunks = iter_windowed_chunks(iter_chunks(input_path, self.chunk_rows), sequence_length)
+        writer = ScoredWriter(output_path)
+        start = time.perf_counter()
+        try:
+            for scored in self._iter_scored(chunks):
+                writer.write(scored)
+                self._rank(scored)
+                self.n_rows += len(scored)
+                logging.info(f"{self.n_rows} linhas pontuadas ({self.n_rows / (time.perf_counter() - start):.0f} linhas/s)")
+        finally:
+            writer.close()
+
+        elapsed = time.perf_counter() - start
+        own_rss, worker_rss = _peak_rss_mib()
+        logging.info(f"{self.n_rows} linhas em {elapsed:.1f}s ({self.n_rows / max(elapsed, 1e-9):.0f} linhas/s)")
+        if own_rss is not None:
+            logging.info(f"Pico de RSS {own_rss:.0f} MiB no processo principal, {worker_rss:.0f} MiB no maior worker")
+
+        if self.ranker is not None and top_k_path:
+            self.ranker.export(top_k_path)
+            logging.info(f"Top {self.top_k} por vaga salvo em {top_k_path}")
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontua offline um arquivo grande de prospects com o artefato salvo.")
+    parser.add_argument("input", help="Arquivo .csv ou .parquet no formato da base df.")
+    parser.add_argument("output", help="Arquivo de saída (.csv ou .parquet), escrito bloco a bloco.")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--top-k", type=int, default=None, help="Guarda os K melhores candidatos de cada vaga.")
+    parser.add_argument("--top-k-output", default=None, help="Arquivo para o top-K por vaga.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    BatchScorer(models_dir=args.models_dir, chunk_rows=args.chunk_rows, workers=args.workers,
+                top_k=args.top_k).run(args.input, args.output, top_k_path=args.top_k_output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_store import PROCESSED_DIR, load_processed, to_columnar
+from app.utils.feature_store import PairFeatureStore
+from app.utils.join import ProspectJoiner
+from app.utils.scoring import CandidateScorer
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class MicroBatcher:
+    # Junta requisições concorrentes num único lote até max_batch itens ou até
+    # max_latency segundos após a primeira chegar, e pontua o lote de uma vez.
+    def __init__(self, score_fn, max_batch=512, max_latency=0.005):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue = asyncio.Queue()
+        self.batch_sizes = Counter()
+        # Uma única thread: o modelo não roda dois lotes ao mesmo tempo e o loop fica livre.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def submit(self, items):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((items, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_latency
+        while size < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch, size
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch, size = await self._collect()
+            self.batch_sizes[1 << max(size - 1, 0).bit_length()] += 1
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                scores = await loop.run_in_executor(self.executor, self.score_fn, items)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            start = 0
+            for request_items, future in batch:
+                if not future.done():
+                    future.set_result(scores[start:start + len(request_items)])
+                start += len(request_items)
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.executor.shutdown(wait=False)
+
+
+class ScoringService:
+    def __init__(self, pipeline, store=None, max_batch=512, max_latency=0.005, latency_window=10_000):
+        if pipeline.sequence_length:
+            raise ValueError("O serviço pontua linhas isoladas e exige um modelo sem janelas: "
+                             "treine com python -m app.train --sequence-length 0.")
+        self.pipeline = pipeline
+        self.store = store
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.latencies = deque(maxlen=latency_window)
+        self.batchers = {}
+
+    def _score_rows(self, rows):
+        return self.pipeline.predict_proba(to_columnar(pd.DataFrame.from_records(rows))).to_numpy()
+
+    def _score_pairs(self, pairs):
+        pairs = np.asarray(pairs)
+        candidate_pos = self.store.candidate_positions(pairs[:, 0])
+        vacancy_pos = self.store.vacancy_positions(pairs[:, 1])
+        known = (candidate_pos >= 0) & (vacancy_pos >= 0)
+        scores = np.full(len(pairs), np.nan)
+        if known.any():
+            scores[known] = self.store.score_pairs(candidate_pos[known], vacancy_pos[known])
+        return scores
+
+    async def start(self):
+        self.batchers['rows'] = MicroBatcher(self._score_rows, self.max_batch, self.max_latency).start()
+        if self.store is not None:
+            self.batchers['pairs'] = MicroBatcher(self._score_pairs, self.max_batch, self.max_latency).start()
+        return self
+
+    async def close(self):
+        for batcher in self.batchers.values():
+            await batcher.close()
+
+    async def score_rows(self, body):
+        rows = body.get('rows') if isinstance(body, dict) else body
+        if isinstance(rows, dict):
+            rows = [rows]
+        if not rows:
+            raise ValueError("Envie 'rows' com ao menos uma linha.")
+        scores = await self.batchers['rows'].submit(rows)
+        return {'approval_probability': [float(score) for score in scores]}
+
+    async def score_pairs(self, body):
+        if 'pairs' not in self.batchers:
+            raise ValueError("Serviço iniciado sem candidatos e vagas: use --processed-dir.")
+        if 'vacancy_id' in body and 'candidate_ids' in body:
+            pairs = [(candidate_id, body['vacancy_id']) for candidate_id in body['candidate_ids']]
+        elif 'candidate_id' in body and 'vacancy_ids' in body:
+            pairs = [(body['candidate_id'], vacancy_id) for vacancy_id in body['vacancy_ids']]
+        elif 'candidate_id' in body and 'vacancy_id' in body:
+            pairs = [(body['candidate_id'], body['vacancy_id'])]
+        else:
+            raise ValueError("Envie vacancy_id + candidate_ids, candidate_id + vacancy_ids ou candidate_id + vacancy_id.")
+        scores = await self.batchers['pairs'].submit(pairs)
+        return {'candidate_id': [int(c) for c, _ in pairs], 'vacancy_id': [int(v) for _, v in pairs],
+                'approval_probability': [None if np.isnan(score) else float(score) for score in scores]}
+
+    def metrics(self):
+        latencies = np.array(self.latencies) * 1000
+        summary = {'requests': len(latencies)}
+        if len(latencies):
+            summary.update({'p50_ms': float(np.percentile(latencies, 50)), 'p99_ms': float(np.percentile(latencies, 99)),
+                            'max_ms': float(latencies.max())})
+        summary['batch_sizes'] = {name: {str(size): count for size, count in sorted(batcher.batch_sizes.items())}
+                                  for name, batcher in self.batchers.items()}
+        return summary
+
+    async def dispatch(self, method, path, body):
+        routes = {('POST', '/score'): self.score_rows, ('POST', '/score/pairs'): self.score_pairs}
+        if (method, path) in routes:
+            start = time.perf_counter()
+            result = await routes[method, path](json.loads(body or b'{}'))
+            self.latencies.append(time.perf_counter() - start)
+            return 200, result
+        if method == 'GET' and path == '/metrics':
+            return 200, self.metrics()
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'model': self.pipeline.model_name}
+        if path in ('/score', '/score/pairs', '/metrics', '/health'):
+            return 405, {'error': f"Método {method} não suportado em {path}"}
+        return 404, {'error': f"Rota não encontrada: {path}"}
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 mínimo com keep-alive, o suficiente para o ATS chamar localmente.
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, payload = await self.dispatch(method, path.split('?', 1)[0], body)
+                except (ValueError, KeyError, TypeError) as e:
+                    status, payload = 400, {'error': str(e)}
+                except Exception as e:
+                    logging.exception("Erro ao pontuar requisição")
+                    status, payload = 500, {'error': str(e)}
+
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+def load_service(models_dir="models", processed_dir=None, max_batch=512, max_latency=0.005):
+    pipeline = CandidateScorer.load(models_dir)
+    store = None
+    if processed_dir:
+        joiner = ProspectJoiner(load_processed('candidates', processed_dir), load_processed('vacancies', processed_dir))
+        store = PairFeatureStore(pipeline, joiner.candidates.reset_index(), joiner.vacancies.reset_index())
+    return ScoringService(pipeline, store=store, max_batch=max_batch, max_latency=max_latency)
+
+
+async def serve(service, host="127.0.0.1", port=8000):
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    logging.info(f"Serviço de pontuação em http://{host}:{port} (lote máximo {service.max_batch}, "
+                 f"janela {service.max_latency * 1000:.1f} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de pontuação com micro-batching.")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--processed-dir", default=None,
+                        help=f"Habilita /score/pairs com candidatos e vagas processados (ex.: {PROCESSED_DIR}).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=512)
+    parser.add_argument("--max-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    service = load_service(args.models_dir, args.processed_dir, args.max_batch, args.max_latency_ms / 1000)
+    asyncio.run(serve(service, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import logging
+
+import pandas as pd
+
+from app.utils.data_store import PROCESSED_DIR, load_processed, read_table
+from app.utils.feature_engineering import FeatureEngineer
+from app.utils.instrumentation import NULL_TIMER, StageTimer
+from app.utils.join import KEY_COLS, apply_delta
+from app.utils.predict import CandidateModelPipeline
+from app.utils.text_features import TextFeatures
+
+TARGET_COLUMN = "prospect_candidate_status_Aprovado"
+
+
+def train(df, models_dir="models", sequence_length=10, sparse=False, n_jobs=None, negative_rate=None, reweight=True,
+          tune=False, tuning=None, cv=None, group_by_vacancy=False, text_features=None, timer=NULL_TIMER):
+    if text_features is not None:
+        # Sobreposição de texto currículo x vaga entra como colunas numéricas comuns.
+        with timer.stage("text_features", rows=len(df)):
+            df = text_features.add_features(df)
+    feature_engineer = FeatureEngineer()
+    pipeline = CandidateModelPipeline(n_jobs=n_jobs)
+    # Os vetores vão junto com o artefato para que a pontuação calcule as mesmas colunas.
+    pipeline.text_features = text_features
+    groups = df["vacancy_id"].to_numpy() if group_by_vacancy else None
+
+    if sparse:
+        X, feature_names = feature_engineer.fit_transform(df, sparse=True, timer=timer)
+        pipeline.run_sparse(X, feature_names, TARGET_COLUMN, models_dir=models_dir,
+                            sequence_length=sequence_length, feature_engineer=feature_engineer,
+                            negative_rate=negative_rate, reweight=reweight, tune=tune, tuning=tuning, cv=cv, groups=groups,
+                            timer=timer)
+        return pipeline
+
+    engineered_df = feature_engineer.fit_transform(df, timer=timer)
+    if TARGET_COLUMN not in engineered_df.columns and "prospect_candidate_status" in df.columns:
+        engineered_df[TARGET_COLUMN] = (df["prospect_candidate_status"] == "Aprovado").astype(int)
+    pipeline.run(engineered_df, target_column=TARGET_COLUMN, models_dir=models_dir,
+                 sequence_length=sequence_length, feature_engineer=feature_engineer,
+                 negative_rate=negative_rate, reweight=reweight, tune=tune, tuning=tuning, cv=cv, groups=groups,
+                 timer=timer)
+    return pipeline
+
+
+def update(df, models_dir="models", history=None, n_estimators=50, max_auc_drop=0.02, n_jobs=None):
+    # Atualização noturna: continua o modelo salvo com os prospects novos e só treina do zero
+    # (com a base completa em history) quando o guarda de AUC pede.
+    pipeline = CandidateModelPipeline.load(models_dir)
+    report = pipeline.update(df, models_dir=models_dir, n_estimators=n_estimators, max_auc_drop=max_auc_drop)
+    if report["status"] == "retrain" and history is not None:
+        # O treino do zero precisa incluir os prospects novos que motivaram a atualização.
+        # Os pares novos entram na posição que teriam num rebuild, para o treino ver as mesmas janelas.
+        if set(KEY_COLS).issubset(history.columns) and set(KEY_COLS).issubset(df.columns):
+            history = apply_delta(history, df)
+        else:
+            history = pd.concat([history, df], ignore_index=True)
+        pipeline = train(history, models_dir=models_dir, sequence_length=pipeline.sequence_length, sparse=pipeline.sparse,
+                         n_jobs=n_jobs, negative_rate=pipeline.negative_rate if pipeline.negative_rate < 1 else None,
+                         reweight=pipeline.calibration_rate >= 1, text_features=pipeline.text_features)
+        report["status"] = "retrained"
+    return pipeline, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina os modelos offline e salva o artefato usado pelo app.")
+    parser.add_argument("--data", default=None,
+                        help=f"Base processada (.parquet ou .csv); por padrão {PROCESSED_DIR}/df.parquet, ou df.csv se não existir.")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--sequence-length", type=int, default=10)
+    parser.add_argument("--sparse", action="store_true", help="Treina a partir da matriz esparsa (CSR).")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--negative-rate", type=float, default=None,
+                        help="Fração dos não aprovados mantida no treino (ex.: 0.2).")
+    parser.add_argument("--no-reweight", action="store_true",
+                        help="Sem pesos no fit; as probabilidades são recalibradas na predição.")
+    parser.add_argument("--tune", action="store_true",
+                        help="Busca hiperparâmetros por successive halving antes do treino final.")
+    parser.add_argument("--tune-budget", type=float, default=None, help="Orçamento de tempo da busca, em segundos.")
+    parser.add_argument("--tune-candidates", type=int, default=8, help="Configurações sorteadas por modelo.")
+    parser.add_argument("--cv", type=int, default=None,
+                        help="Avalia com k folds em paralelo (sem embaralhar as janelas) em vez de um único split.")
+    parser.add_argument("--group-by-vacancy", action="store_true", help="Com --cv, cada vaga fica inteira num único fold.")
+    parser.add_argument("--update", default=None,
+                        help="Prospects recém rotulados (.parquet ou .csv) para atualizar o modelo salvo em vez de treinar do zero.")
+    parser.add_argument("--update-estimators", type=int, default=50)
+    parser.add_argument("--max-auc-drop", type=float, default=0.02)
+    parser.add_argument("--text-features", default=None,
+                        help="Vetores de texto gerados por python -m app.utils.text_features (ex.: data/processed/text_features.joblib).")
+    parser.add_argument("--timings", default=None,
+                        help="Arquivo JSON lines com tempo, CPU, linhas/s e memória de cada etapa do treino.")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Com --timings, mede o pico de memória de cada etapa com tracemalloc (mais lento).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.update:
+        history = load_processed("df") if args.data is None else read_table(args.data)
+        _, report = update(read_table(args.update), models_dir=args.models_dir, history=history,
+                           n_estimators=args.update_estimators, max_auc_drop=args.max_auc_drop, n_jobs=args.n_jobs)
+        logging.info(f"Atualização: {report}")
+        return
+
+    df = load_processed("df") if args.data is None else read_table(args.data)
+    timer = StageTimer(trace_memory=args.trace_memory, log_path=args.timings) if args.timings else NULL_TIMER
+    pipeline = train(df, models_dir=args.models_dir, sequence_length=args.sequence_length,
+                     sparse=args.sparse, n_jobs=args.n_jobs, negative_rate=args.negative_rate,
+                     reweight=not args.no_reweight, tune=args.tune,
+                     tuning={"time_budget": args.tune_budget, "n_candidates": args.tune_candidates},
+                     cv=args.cv, group_by_vacancy=args.group_by_vacancy,
+                     text_features=TextFeatures.load(args.text_features) if args.text_features else None, timer=timer)
+    for record in timer.records:
+        logging.info(f"{'  ' * record['depth']}{record['stage']}: {record['wall_s']:.2f}s")
+    logging.info(f"Melhor modelo: {pipeline.model_name} (ROC-AUC {pipeline.metrics[pipeline.model_name]['roc_auc']:.4f})")
+
+
+if __name__ == "__main__":
+    main()
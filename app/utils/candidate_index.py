@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from app.utils.data_store import to_columnar
+from app.utils.feature_engineering import EXACT_MATCHES, SP_DDDS
+from app.utils.join import MISSING_VALUE
+
+# Restrição -> (coluna da vaga, coluna do candidato), na mesma semântica das features match_*.
+LEVEL_CONSTRAINTS = {name.replace('match_', '', 1): cols for name, cols in EXACT_MATCHES.items()}
+CONSTRAINTS = tuple(LEVEL_CONSTRAINTS) + ('pcd', 'region')
+
+
+def _normalize(value):
+    return str(value).strip().lower()
+
+
+def _is_missing(value):
+    return value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)) or value == MISSING_VALUE
+
+
+class CandidateIndex:
+    # Índice invertido dos candidatos: um bitset (np.packbits) por valor de cada atributo.
+    # Uma vaga vira um AND/contagem de poucos bitsets de ~5 KB, o que reduz os candidatos
+    # pontuados pelo modelo a uma lista curta.
+    def __init__(self, candidates):
+        candidates = to_columnar(candidates).drop_duplicates(subset='candidate_id', keep='last').reset_index(drop=True)
+        self.candidate_ids = candidates['candidate_id'].to_numpy()
+        self.size = len(candidates)
+
+        self.postings = {name: self._postings(candidates[candidate_col]) for name, (_, candidate_col) in LEVEL_CONSTRAINTS.items()}
+        self.missing = {name: self._bits(candidates[candidate_col].isna().to_numpy()) for name, (_, candidate_col) in LEVEL_CONSTRAINTS.items()}
+
+        self.ddd_postings = self._postings(candidates['candidate_ddd_mobile'])
+        self.missing['region'] = self._bits(candidates['candidate_ddd_mobile'].isna().to_numpy())
+        self.sp_bits = self._empty()
+        for ddd in SP_DDDS:
+            self.sp_bits |= self.ddd_postings.get(ddd, self._empty())
+
+        self.pcd_bits = self._bits((candidates['candidate_pcd'] == 'Sim').to_numpy())
+        self.missing['pcd'] = self._bits(candidates['candidate_pcd'].isna().to_numpy())
+        self.all_bits = self._bits(np.ones(self.size, dtype=bool))
+
+    def _bits(self, mask):
+        return np.packbits(mask)
+
+    def _empty(self):
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _postings(self, values):
+        codes, uniques = pd.factorize(values)
+        normalized_codes, normalized = pd.factorize(pd.Index(uniques.astype(str)).str.strip().str.lower())
+        codes = np.append(normalized_codes, -1)[codes]
+        return {value: self._bits(codes == i) for i, value in enumerate(normalized)}
+
+    def constraint_bits(self, name, vacancy, allow_missing=False):
+        # Bitset dos candidatos que atendem a restrição, ou None quando a vaga não a define.
+        if name in LEVEL_CONSTRAINTS:
+            value = vacancy.get(LEVEL_CONSTRAINTS[name][0])
+            if _is_missing(value):
+                return None
+            bits = self.postings[name].get(_normalize(value), self._empty())
+        elif name == 'pcd':
+            if vacancy.get('vacancy_pcd') != 'Sim':
+                return None
+            bits = self.pcd_bits
+        elif name == 'region':
+            value = vacancy.get('vacancy_region')
+            if _is_missing(value) or _normalize(value) != 'são paulo':
+                return None
+            bits = self.sp_bits
+        else:
+            raise ValueError(f"Restrição desconhecida: {name}. Use uma de {CONSTRAINTS}.")
+        return bits | self.missing[name] if allow_missing else bits
+
+    def query(self, vacancy, hard=(), soft=CONSTRAINTS, min_soft=1, allow_missing=False):
+        # Posições dos candidatos que atendem todas as restrições hard e ao menos
+        # min_soft das restrições soft definidas pela vaga.
+        bits = self.all_bits.copy()
+        for name in hard:
+            constraint = self.constraint_bits(name, vacancy, allow_missing)
+            if constraint is not None:
+                bits &= constraint
+
+        soft_bits = [b for b in (self.constraint_bits(name, vacancy, allow_missing) for name in soft) if b is not None]
+        required = min(min_soft, len(soft_bits))
+        if required == len(soft_bits):
+            for constraint in soft_bits:
+                bits &= constraint
+        elif required == 1:
+            bits &= np.bitwise_or.reduce(soft_bits)
+        elif required > 1:
+            # Contador saturado bit a bit: levels[j] marca quem atende mais de j restrições.
+            levels = [self._empty() for _ in range(required)]
+            for constraint in soft_bits:
+                for j in range(required - 1, 0, -1):
+                    levels[j] |= levels[j - 1] & constraint
+                levels[0] |= constraint
+            bits &= levels[-1]
+        return self._positions(bits)
+
+    def _positions(self, bits):
+        # Desempacota só os bytes não nulos do bitset.
+        nonzero = np.flatnonzero(bits)
+        rows, cols = np.nonzero(np.unpackbits(bits[nonzero]).reshape(-1, 8))
+        return nonzero[rows] * 8 + cols
+
+    def shortlist(self, vacancy, hard=(), soft=CONSTRAINTS, min_soft=1, allow_missing=False):
+        return self.candidate_ids[self.query(vacancy, hard=hard, soft=soft, min_soft=min_soft, allow_missing=allow_missing)]
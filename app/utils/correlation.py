@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+# Variância relativa (var / média²) abaixo disso é tratada como coluna constante.
+ZERO_VARIANCE_EPS = 1e-12
+# Blocos esparsos são densificados neste número de linhas para centralizar os dados.
+SPARSE_BLOCK_ROWS = 4096
+
+
+class CorrelationFilter:
+    # Acumula n, média e a soma dos produtos centrados por blocos de linhas, juntando os blocos
+    # pela fórmula de Chan; a matriz de correlação (p x p) sai dessas estatísticas, sem manter
+    # os dados em memória. Centralizar cada bloco evita o cancelamento de X^T X / n - média²
+    # em colunas constantes ou quase constantes.
+    def __init__(self, threshold=0.9):
+        self.threshold = threshold
+        self.feature_names = None
+        self.n_rows = 0
+        self.means = None
+        self.comoments = None
+        self.drop_columns = None
+
+    def _merge(self, X):
+        n = X.shape[0]
+        if n == 0:
+            return
+        mean = X.mean(axis=0)
+        centered = X - mean
+        total = self.n_rows + n
+        delta = mean - self.means
+        self.comoments += centered.T @ centered + np.outer(delta, delta) * (self.n_rows * n / total)
+        self.means += delta * (n / total)
+        self.n_rows = total
+
+    def partial_fit(self, X, feature_names=None):
+        if isinstance(X, pd.DataFrame):
+            feature_names = list(X.columns)
+            X = X.to_numpy(dtype=np.float64)
+        if self.feature_names is None:
+            self.feature_names = list(feature_names) if feature_names is not None else list(range(X.shape[1]))
+            self.means = np.zeros(X.shape[1])
+            self.comoments = np.zeros((X.shape[1], X.shape[1]))
+
+        if sp.issparse(X):
+            X = X.tocsr()
+            for start in range(0, X.shape[0], SPARSE_BLOCK_ROWS):
+                self._merge(X[start:start + SPARSE_BLOCK_ROWS].toarray().astype(np.float64))
+        else:
+            X = np.asarray(X, dtype=np.float64)
+            if np.isnan(X).any():
+                raise ValueError("CorrelationFilter não aceita valores ausentes.")
+            self._merge(X)
+        self.drop_columns = None
+        return self
+
+    def fit(self, X, feature_names=None, chunk_size=50_000):
+        for start in range(0, X.shape[0], chunk_size):
+            chunk = X.iloc[start:start + chunk_size] if isinstance(X, pd.DataFrame) else X[start:start + chunk_size]
+            self.partial_fit(chunk, feature_names)
+        return self
+
+    def fit_chunks(self, chunks, feature_names=None):
+        for chunk in chunks:
+            self.partial_fit(chunk, feature_names)
+        return self
+
+    def correlation(self):
+        cov = self.comoments / self.n_rows
+        variance = np.diag(cov)
+        # Como no df.corr(), colunas sem variância ficam com correlação NaN e nunca são descartadas.
+        constant = variance <= ZERO_VARIANCE_EPS * self.means ** 2
+        std = np.sqrt(np.where(constant, np.nan, variance))
+        return cov / np.outer(std, std)
+
+    def columns_to_drop(self):
+        if self.drop_columns is None:
+            # Mesma regra de antes: descarta a coluna j se corr(i, j) > threshold para algum i < j.
+            upper = np.triu(self.correlation(), k=1)
+            dropped = np.flatnonzero((upper > self.threshold).any(axis=0))
+            self.drop_columns = [self.feature_names[i] for i in dropped]
+        return self.drop_columns
+
+    def kept_positions(self):
+        dropped = set(self.columns_to_drop())
+        return [i for i, name in enumerate(self.feature_names) if name not in dropped]
@@ -0,0 +1,104 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.utils.feature_engineering import RELEVANT_COLS_FOR_ONEHOT
+
+PROCESSED_DIR = "data/processed"
+
+ID_COLS = ['candidate_id', 'vacancy_id', 'prospect_id', 'prospect_candidate_code']
+CATEGORICAL_COLS = RELEVANT_COLS_FOR_ONEHOT + ['candidate_ddd_mobile']
+DATE_COLS = {'prospect_application_date': '%d-%m-%Y'}
+
+
+def to_columnar(df):
+    df = df.copy()
+    for col in df.columns:
+        if col in ID_COLS:
+            ids = pd.to_numeric(df[col], errors='coerce')
+            df[col] = ids.astype('int64') if ids.notna().all() else ids.astype('Int64')
+        elif col in DATE_COLS and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=DATE_COLS[col], errors='coerce')
+        elif col in CATEGORICAL_COLS:
+            # DDD é lido como float do CSV (11.0); guardamos o texto original ('11').
+            values = df[col]
+            if pd.api.types.is_float_dtype(values):
+                values = values.astype('Int64')
+            # Texto vazio vira ausente, como acontece na ida e volta pelo CSV.
+            text = values.astype('string')
+            text = text.mask(text.str.strip() == '', pd.NA)
+            df[col] = pd.Categorical(text.to_numpy(dtype=object, na_value=np.nan))
+    return df
+
+
+def arrow_schema(df):
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    # Dicionários com índice int32 para que blocos com vocabulários diferentes compartilhem o schema.
+    for i, field in enumerate(schema):
+        if pa.types.is_dictionary(field.type):
+            schema = schema.set(i, pa.field(field.name, pa.dictionary(pa.int32(), pa.string())))
+    return schema
+
+
+class ParquetChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+        self.schema = None
+
+    def write(self, df):
+        df = to_columnar(df)
+        if self.writer is None:
+            self.schema = arrow_schema(df)
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def save_processed(df, name, processed_dir=PROCESSED_DIR):
+    os.makedirs(processed_dir, exist_ok=True)
+    path = os.path.join(processed_dir, f"{name}.parquet")
+    to_columnar(df).to_parquet(path, index=False)
+    return path
+
+
+def read_table(path, columns=None):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    return to_columnar(pd.read_csv(path, usecols=columns))
+
+
+def load_processed(name, processed_dir=PROCESSED_DIR, columns=None):
+    path = os.path.join(processed_dir, f"{name}.parquet")
+    if not os.path.exists(path):
+        path = os.path.join(processed_dir, f"{name}.csv")
+    return read_table(path, columns=columns)
+
+
+def convert_processed(processed_dir=PROCESSED_DIR, names=("candidates", "vacancies", "prospects", "df")):
+    for name in names:
+        csv_path = os.path.join(processed_dir, f"{name}.csv")
+        if os.path.exists(csv_path):
+            path = save_processed(pd.read_csv(csv_path), name, processed_dir)
+            logging.info(f"{csv_path} convertido para {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte data/processed/*.csv para Parquet com tipos categóricos.")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    convert_processed(args.processed_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,239 @@
+import joblib
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
+import scipy.sparse as sp
+
+from app.utils.instrumentation import NULL_TIMER
+
+SP_DDDS = ['11', '12', '13', '14', '15', '16', '17', '18', '19']
+
+DROP_COLS = [
+    'prospect_application_date', 'candidate_ddd_mobile',
+    'vacancy_id', 'candidate_id', 'prospect_id', 'prospect_candidate_code'
+]
+
+RELEVANT_COLS_FOR_ONEHOT = [
+    'vacancy_contract_type', 'vacancy_sap', 'vacancy_region', 'vacancy_english_level',
+    'vacancy_professional_level', 'vacancy_education_level', 'vacancy_spanish_level',
+    'vacancy_pcd', 'prospect_candidate_status', 'candidate_academic_level',
+    'candidate_english_level', 'candidate_spanish_level', 'candidate_pcd'
+]
+
+EXACT_MATCHES = {
+    'match_education_level': ('vacancy_education_level', 'candidate_academic_level'),
+    'match_english_level': ('vacancy_english_level', 'candidate_english_level'),
+    'match_spanish_level': ('vacancy_spanish_level', 'candidate_spanish_level'),
+}
+
+# Slots reservados para categorias não vistas no fit().
+UNKNOWN_CATEGORY = '__desconhecido__'
+UNKNOWN_LABEL = -1
+
 
 class FeatureEngineer:
     def __init__(self):
         self.label_encoders = {}
         self.one_hot_cols = []
+        self.categories = {}
+        self.passthrough_cols = []
+        self.feature_columns = None
 
     def match_exact(self, a, b):
         if pd.isna(a) or pd.isna(b):
             return 0
         return int(str(a).strip().lower() == str(b).strip().lower())
 
-    def add_custom_features(self, df):
-        df['match_education_level'] = df.apply(lambda x: self.match_exact(x['vacancy_education_level'], x['candidate_academic_level']), axis=1)
-        df['match_english_level'] = df.apply(lambda x: self.match_exact(x['vacancy_english_level'], x['candidate_english_level']), axis=1)
-        df['match_spanish_level'] = df.apply(lambda x: self.match_exact(x['vacancy_spanish_level'], x['candidate_spanish_level']), axis=1)
-        df['match_pcd'] = df.apply(lambda x: int(x['vacancy_pcd'] == 'Sim' and x['candidate_pcd'] == 'Sim'), axis=1)
+    def _normalized_codes(self, *columns):
+        # Normaliza apenas os valores distintos de cada coluna e devolve códigos
+        # inteiros num vocabulário comum (-1 para valores ausentes).
+        factorized = [pd.factorize(col) for col in columns]
+        normalized = [pd.Index(uniques.astype(str)).str.strip().str.lower() for _, uniques in factorized]
+        vocab, inverse = np.unique(np.concatenate([n.to_numpy(dtype=object) for n in normalized]).astype(str), return_inverse=True)
+
+        results, offset = [], 0
+        for (codes, _), norm in zip(factorized, normalized):
+            mapping = np.append(inverse[offset:offset + len(norm)], -1)
+            results.append(mapping[codes])
+            offset += len(norm)
+        return results
+
+    def match_exact_columns(self, a, b):
+        codes_a, codes_b = self._normalized_codes(a, b)
+        return ((codes_a == codes_b) & (codes_a >= 0)).astype(int)
+
+    def is_pcd(self, values):
+        return (values == 'Sim').to_numpy()
 
-        sp_ddds = ['11', '12', '13', '14', '15', '16', '17', '18', '19']
-        df['mobile_region_match'] = df.apply(lambda x: int(str(x['vacancy_region']).lower() == 'são paulo' and str(x['candidate_ddd_mobile']) in sp_ddds), axis=1)
+    def is_sp_region(self, values):
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        return np.array([str(v).lower() == 'são paulo' for v in uniques], dtype=bool)[codes]
+
+    def is_sp_ddd(self, values):
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        return np.array([str(v) in SP_DDDS for v in uniques], dtype=bool)[codes]
+
+    def _source_column(self, df, col):
+        # Coluna de origem ausente conta como valor ausente: o match correspondente fica 0.
+        if col in df.columns:
+            return df[col]
+        return pd.Series(None, index=df.index, dtype=object)
+
+    def add_custom_features(self, df):
+        column = lambda col: self._source_column(df, col)
+        for name, (vacancy_col, candidate_col) in EXACT_MATCHES.items():
+            df[name] = self.match_exact_columns(column(vacancy_col), column(candidate_col))
+        df['match_pcd'] = (self.is_pcd(column('vacancy_pcd')) & self.is_pcd(column('candidate_pcd'))).astype(int)
+        df['mobile_region_match'] = (self.is_sp_region(column('vacancy_region')) & self.is_sp_ddd(column('candidate_ddd_mobile'))).astype(int)
 
         return df
 
-    def encode_features(self, df):
-        df = df.copy()
-        df.drop(columns=['prospect_application_date', 'candidate_ddd_mobile'], inplace=True, errors='ignore')
+    def _fit_encoders(self, df):
+        # Só o ajuste precisa do sklearn; transform() usa apenas classes_ dos encoders salvos.
+        from sklearn.preprocessing import LabelEncoder
 
-        relevant_cols_for_onehot = [
-            'vacancy_contract_type', 'vacancy_sap', 'vacancy_region', 'vacancy_english_level',
-            'vacancy_professional_level', 'vacancy_education_level', 'vacancy_spanish_level',
-            'vacancy_pcd', 'prospect_candidate_status', 'candidate_academic_level',
-            'candidate_english_level', 'candidate_spanish_level', 'candidate_pcd'
-        ]
+        self.label_encoders = {}
+        self.one_hot_cols = []
+        self.categories = {}
 
-        for col in relevant_cols_for_onehot:
+        df = df.drop(columns=DROP_COLS, errors='ignore')
+        for col in RELEVANT_COLS_FOR_ONEHOT:
             if col in df.columns:
                 n_unique = df[col].nunique()
                 if n_unique > 2:
                     self.one_hot_cols.append(col)
+                    self.categories[col] = pd.Index(pd.Categorical(df[col].dropna().astype(object)).categories)
                 else:
                     le = LabelEncoder()
-                    df[col] = le.fit_transform(df[col].astype(str))
+                    le.fit(df[col].astype(str))
                     self.label_encoders[col] = le
             else:
                 print(f"Coluna '{col}' não encontrada no dataframe.")
 
-        df = pd.get_dummies(df, columns=self.one_hot_cols)
-        dummy_cols = [col for col in df.columns if any(prefix in col for prefix in self.one_hot_cols)]
-        df[dummy_cols] = df[dummy_cols].astype(int)
+        self.passthrough_cols = [col for col in df.columns if col not in self.one_hot_cols]
+        self.feature_columns = self.passthrough_cols + [
+            f"{col}_{category}" for col in self.one_hot_cols
+            for category in list(self.categories[col]) + [UNKNOWN_CATEGORY]
+        ]
+        return self
 
-        return df
+    def _label_encode(self, col, values):
+        mapping = {label: code for code, label in enumerate(self.label_encoders[col].classes_)}
+        return values.astype(str).map(mapping).fillna(UNKNOWN_LABEL).astype(int)
+
+    def _category_codes(self, col, values):
+        categories = self.categories[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Colunas categóricas: mapeia só o vocabulário da coluna e reaproveita os códigos.
+            lookup = np.append(categories.get_indexer(values.cat.categories.astype(object)), -1)
+            lookup[:-1][lookup[:-1] == -1] = len(categories)
+            return lookup[values.cat.codes.to_numpy()]
 
-    def preprocess(self, df):
-        df = self.add_custom_features(df)
-        df = self.encode_features(df)
+        codes = categories.get_indexer(values.astype(object))
+        codes[(codes == -1) & values.notna().to_numpy()] = len(categories)
+        return codes
+
+    def _one_hot(self, col, values):
+        categories = self.categories[col]
+        codes = self._category_codes(col, values)
+
+        dummies = np.zeros((len(values), len(categories) + 1), dtype=int)
+        known = codes >= 0
+        dummies[np.flatnonzero(known), codes[known]] = 1
+        columns = [f"{col}_{category}" for category in list(categories) + [UNKNOWN_CATEGORY]]
+        return pd.DataFrame(dummies, index=values.index, columns=columns)
+
+    def _encode(self, df):
+        if self.feature_columns is None:
+            raise RuntimeError("FeatureEngineer não ajustado: chame fit() antes de transform().")
+
+        missing = pd.Series(np.nan, index=df.index)
+        encoded = {}
+        for col in self.passthrough_cols:
+            if col in self.label_encoders:
+                encoded[col] = self._label_encode(col, df[col] if col in df.columns else missing)
+            else:
+                encoded[col] = df[col] if col in df.columns else 0
+
+        frames = [pd.DataFrame(encoded, index=df.index)]
+        frames += [self._one_hot(col, df[col] if col in df.columns else missing) for col in self.one_hot_cols]
+        return pd.concat(frames, axis=1)
+
+    def _one_hot_sparse(self, col, values):
+        categories = self.categories[col]
+        codes = self._category_codes(col, values)
+
+        known = codes >= 0
+        indptr = np.concatenate([[0], np.cumsum(known)])
+        return sp.csr_matrix(
+            (np.ones(known.sum(), dtype=np.float32), codes[known], indptr),
+            shape=(len(values), len(categories) + 1),
+        )
+
+    def _encode_sparse(self, df):
+        if self.feature_columns is None:
+            raise RuntimeError("FeatureEngineer não ajustado: chame fit() antes de transform().")
+
+        missing = pd.Series(np.nan, index=df.index)
+        dense = np.zeros((len(df), len(self.passthrough_cols)), dtype=np.float32)
+        for i, col in enumerate(self.passthrough_cols):
+            if col in self.label_encoders:
+                dense[:, i] = self._label_encode(col, df[col] if col in df.columns else missing)
+            elif col in df.columns:
+                dense[:, i] = df[col].to_numpy(dtype=np.float32)
+
+        blocks = [sp.csr_matrix(dense)]
+        blocks += [self._one_hot_sparse(col, df[col] if col in df.columns else missing) for col in self.one_hot_cols]
+        return sp.hstack(blocks, format='csr'), list(self.feature_columns)
+
+    def feature_sources(self):
+        sources = {col: col for col in self.passthrough_cols}
+        for col in self.one_hot_cols:
+            for category in list(self.categories[col]) + [UNKNOWN_CATEGORY]:
+                sources[f"{col}_{category}"] = col
+        return sources
+
+    def encode_features(self, df, timer=NULL_TIMER):
+        with timer.stage("encoders", rows=len(df)):
+            self._fit_encoders(df)
+        with timer.stage("encoding", rows=len(df)):
+            return self._encode(df)
+
+    def _custom_features(self, df, timer):
+        with timer.stage("custom_features", rows=len(df)):
+            return self.add_custom_features(df)
+
+    def _encode_with(self, df, sparse, timer):
+        with timer.stage("encoding", rows=len(df)):
+            return self._encode_sparse(df) if sparse else self._encode(df)
+
+    def fit(self, df, timer=NULL_TIMER):
+        df = self._custom_features(df.copy(), timer)
+        with timer.stage("encoders", rows=len(df)):
+            return self._fit_encoders(df)
+
+    def transform(self, df, sparse=False, timer=NULL_TIMER):
+        df = self._custom_features(df.copy(), timer)
+        # Colunas categóricas ausentes viram categoria desconhecida, mas uma coluna numérica do
+        # treino não tem valor neutro: preenchê-la com 0 mudaria as predições em silêncio.
+        missing = [col for col in self.passthrough_cols if col not in df.columns and col not in self.label_encoders]
+        if missing:
+            raise ValueError(f"Colunas usadas no treino ausentes nos dados: {', '.join(missing)}")
+        return self._encode_with(df, sparse, timer)
+
+    def fit_transform(self, df, sparse=False, timer=NULL_TIMER):
+        df = self._custom_features(df.copy(), timer)
+        with timer.stage("encoders", rows=len(df)):
+            self._fit_encoders(df)
+        return self._encode_with(df, sparse, timer)
+
+    def preprocess(self, df, timer=NULL_TIMER):
+        df = self._custom_features(df, timer)
+        df = self.encode_features(df, timer)
         return df
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
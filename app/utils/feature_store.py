@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+from app.utils.feature_engineering import EXACT_MATCHES
+from app.utils.data_store import to_columnar
+from app.utils.join import _fill_missing
+from app.utils.text_features import TEXT_FEATURES
+
+CANDIDATE_PREFIX = 'candidate_'
+VACANCY_PREFIX = 'vacancy_'
+
+
+class PairFeatureStore:
+    # Codifica cada candidato e cada vaga uma única vez no layout de features do
+    # modelo e monta as features de um par (candidato, vaga) por gathers:
+    # X = C[candidatos] + V[vagas] + constantes do par + flags match_* + sobreposição de texto.
+    def __init__(self, pipeline, candidates, vacancies):
+        if pipeline.sequence_length:
+            raise ValueError("Pontuar pares exige um modelo sem janelas: treine com sequence_length=0 "
+                             "(python -m app.train --sequence-length 0).")
+        if pipeline.feature_engineer is None:
+            raise ValueError("O artefato não tem FeatureEngineer salvo.")
+
+        self.pipeline = pipeline
+        self.feature_engineer = pipeline.feature_engineer
+        self.text_features = pipeline.text_features
+        self.columns = list(pipeline.feature_columns)
+        self.positions = {col: i for i, col in enumerate(self.columns)}
+        self.text_columns = [col for col in TEXT_FEATURES if col in self.positions]
+        if self.text_columns and self.text_features is None:
+            raise ValueError("O modelo usa features de texto, mas o artefato não tem os vetores de texto salvos.")
+        self.dtype = np.dtype(pipeline.dtype) if np.dtype(pipeline.dtype).kind == 'f' else np.dtype(np.float32)
+
+        candidates, vacancies = self._clean(candidates), self._clean(vacancies)
+        self.candidate_ids = candidates['candidate_id'].to_numpy()
+        self.vacancy_ids = vacancies['vacancy_id'].to_numpy()
+        self.candidate_index = pd.Index(self.candidate_ids)
+        self.vacancy_index = pd.Index(self.vacancy_ids)
+
+        sources = self.feature_engineer.feature_sources()
+        owner = np.array([self._owner(sources.get(col, col)) for col in self.columns])
+        self.candidate_block = self._encode_side(candidates, owner == 'candidate')
+        self.vacancy_block = self._encode_side(vacancies, owner == 'vacancy')
+        self.pair_constant = self._encode_side(pd.DataFrame(index=[0]), owner == 'pair')[0]
+        self._encode_matches(candidates, vacancies)
+
+    def _clean(self, df):
+        # Mesmo preenchimento de ausentes aplicado pelo ProspectJoiner na base df.
+        df = to_columnar(df)
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = _fill_missing(df[col])
+        return df
+
+    def _owner(self, source):
+        if source.startswith('match_') or source == 'mobile_region_match':
+            return 'match'
+        if source in TEXT_FEATURES:
+            return 'text'
+        if source.startswith(CANDIDATE_PREFIX):
+            return 'candidate'
+        if source.startswith(VACANCY_PREFIX):
+            return 'vacancy'
+        return 'pair'
+
+    def _encode_side(self, df, mask):
+        encoded = self.feature_engineer._encode(df).reindex(columns=self.columns, fill_value=0)
+        block = encoded.to_numpy(dtype=self.dtype)
+        block[:, ~mask] = 0
+        return block
+
+    def _encode_matches(self, candidates, vacancies):
+        fe = self.feature_engineer
+        self.match_codes = {}
+        for name, (vacancy_col, candidate_col) in EXACT_MATCHES.items():
+            if name in self.positions:
+                vacancy_codes, candidate_codes = fe._normalized_codes(fe._source_column(vacancies, vacancy_col),
+                                                                        fe._source_column(candidates, candidate_col))
+                self.match_codes[name] = (vacancy_codes, candidate_codes)
+
+        self.match_flags = {}
+        if 'match_pcd' in self.positions:
+            self.match_flags['match_pcd'] = (fe.is_pcd(fe._source_column(vacancies, 'vacancy_pcd')),
+                                             fe.is_pcd(fe._source_column(candidates, 'candidate_pcd')))
+        if 'mobile_region_match' in self.positions:
+            self.match_flags['mobile_region_match'] = (fe.is_sp_region(fe._source_column(vacancies, 'vacancy_region')),
+                                                       fe.is_sp_ddd(fe._source_column(candidates, 'candidate_ddd_mobile')))
+
+    def candidate_positions(self, candidate_ids):
+        return self.candidate_index.get_indexer(candidate_ids)
+
+    def vacancy_positions(self, vacancy_ids):
+        return self.vacancy_index.get_indexer(vacancy_ids)
+
+    def pair_features(self, candidate_pos, vacancy_pos):
+        candidate_pos = np.asarray(candidate_pos)
+        vacancy_pos = np.broadcast_to(np.asarray(vacancy_pos), candidate_pos.shape)
+
+        X = self.candidate_block[candidate_pos] + self.vacancy_block[vacancy_pos] + self.pair_constant
+        for name, (vacancy_codes, candidate_codes) in self.match_codes.items():
+            v, c = vacancy_codes[vacancy_pos], candidate_codes[candidate_pos]
+            X[:, self.positions[name]] = (v == c) & (v >= 0)
+        for name, (vacancy_flag, candidate_flag) in self.match_flags.items():
+            X[:, self.positions[name]] = vacancy_flag[vacancy_pos] & candidate_flag[candidate_pos]
+        if self.text_columns:
+            # Sobreposição de texto depende do par: calculada com os vetores salvos no artefato.
+            overlap = self.text_features.overlap(self.candidate_ids[candidate_pos], self.vacancy_ids[vacancy_pos])
+            for name in self.text_columns:
+                X[:, self.positions[name]] = overlap[name]
+        return X
+
+    def score_pairs(self, candidate_pos, vacancy_pos, batch_size=50_000):
+        candidate_pos = np.asarray(candidate_pos)
+        vacancy_pos = np.broadcast_to(np.asarray(vacancy_pos), candidate_pos.shape)
+        scores = np.empty(len(candidate_pos))
+        for start in range(0, len(candidate_pos), batch_size):
+            stop = start + batch_size
+            X = self.pair_features(candidate_pos[start:stop], vacancy_pos[start:stop])
+            scores[start:stop] = self.pipeline._recalibrate(self.pipeline.model.predict_proba(X)[:, 1])
+        return scores
+
+    def iter_vacancy_scores(self, vacancy_pos=None, candidate_pos=None, batch_size=50_000):
+        vacancy_pos = np.arange(len(self.vacancy_ids)) if vacancy_pos is None else np.asarray(vacancy_pos)
+        candidate_pos = np.arange(len(self.candidate_ids)) if candidate_pos is None else np.asarray(candidate_pos)
+        for position in vacancy_pos:
+            yield position, candidate_pos, self.score_pairs(candidate_pos, position, batch_size)
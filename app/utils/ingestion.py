@@ -0,0 +1,218 @@
+import argparse
+import json
+import logging
+import os
+import re
+
+import pandas as pd
+
+from app.utils.data_store import ParquetChunkWriter
+
+DDD_PATTERN = re.compile(r'\(?(\d{2})\)?')
+
+CANDIDATE_FIELDS = {
+    'candidate_ddd_mobile': ('informacoes_pessoais', 'telefone_celular'),
+    'candidate_pcd': ('informacoes_pessoais', 'pcd'),
+    'candidate_certifications': ('informacoes_profissionais', 'certificacoes'),
+    'candidate_academic_level': ('formacao_e_idiomas', 'nivel_academico'),
+    'candidate_english_level': ('formacao_e_idiomas', 'nivel_ingles'),
+    'candidate_spanish_level': ('formacao_e_idiomas', 'nivel_espanhol'),
+}
+
+VACANCY_FIELDS = {
+    'vacancy_contract_type': ('informacoes_basicas', 'tipo_contratacao'),
+    'vacancy_sap': ('informacoes_basicas', 'vaga_sap'),
+    'vacancy_region': ('perfil_vaga', 'estado'),
+    'vacancy_pcd': ('perfil_vaga', 'vaga_especifica_para_pcd'),
+    'vacancy_professional_level': ('perfil_vaga', 'nivel profissional'),
+    'vacancy_education_level': ('perfil_vaga', 'nivel_academico'),
+    'vacancy_english_level': ('perfil_vaga', 'nivel_ingles'),
+    'vacancy_spanish_level': ('perfil_vaga', 'nivel_espanhol'),
+}
+
+PROSPECT_FIELDS = {
+    'prospect_candidate_code': ('codigo',),
+    'prospect_candidate_status': ('situacao_candidado',),
+    'prospect_application_date': ('data_candidatura',),
+}
+
+
+class JsonObjectStream:
+    # Lê um arquivo no formato {id: registro, ...} devolvendo um par (id, registro)
+    # por vez, sem carregar o arquivo inteiro em memória.
+    def __init__(self, path, buffer_size=1 << 20):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.file.read(self.buffer_size)
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _expect(self, *tokens):
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer) or self.buffer[self.pos] not in tokens:
+            found = self.buffer[self.pos:self.pos + 20] if self.pos < len(self.buffer) else 'EOF'
+            raise ValueError(f"JSON inválido em {self.path}: esperado {' ou '.join(tokens)}, encontrado {found!r}")
+        self.pos += 1
+        return self.buffer[self.pos - 1]
+
+    def _decode(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # Um valor que termina exatamente no fim do buffer pode estar truncado.
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def __iter__(self):
+        with open(self.path, 'r', encoding='utf-8') as self.file:
+            self.buffer, self.pos, self.eof = '', 0, False
+            self._expect('{')
+            self._skip_whitespace()
+            if self.buffer[self.pos:self.pos + 1] == '}':
+                return
+            while True:
+                key = self._decode()
+                self._expect(':')
+                yield key, self._decode()
+                if self._expect(',', '}') == '}':
+                    return
+
+
+def _get(record, path):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+def extract_ddd(phone):
+    match = DDD_PATTERN.search(phone or "")
+    return match.group(1) if match else None
+
+
+def _clean_candidates(df):
+    df['candidate_ddd_mobile'] = df['candidate_ddd_mobile'].map(extract_ddd)
+    df = df.replace(r'^\s*$', pd.NA, regex=True)
+    df['candidate_certifications'] = df['candidate_certifications'].notna().astype('int8')
+    return df
+
+
+def _clean_vacancies(df):
+    contract = df['vacancy_contract_type']
+    contract = contract.mask(contract.astype('string').str.contains('CLT', na=False), 'CLT')
+    df['vacancy_contract_type'] = contract.mask(contract.astype('string').str.contains('PJ', na=False), 'PJ')
+    return df
+
+
+class ColumnBuffer:
+    # Acumula os campos extraídos por coluna e grava blocos de chunk_rows linhas
+    # em Parquet (tipos categóricos, ver data_store) ou em CSV.
+    def __init__(self, path, columns, clean=None, chunk_rows=50_000):
+        self.path = path
+        self.columns = columns
+        self.clean = clean
+        self.chunk_rows = chunk_rows
+        self.data = {col: [] for col in columns}
+        self.rows = 0
+        self.written = 0
+        self.parquet = ParquetChunkWriter(path) if path.endswith('.parquet') else None
+
+    def append(self, values):
+        for col, value in zip(self.columns, values):
+            self.data[col].append(value)
+        self.rows += 1
+        if self.rows >= self.chunk_rows:
+            self.flush()
+
+    def close(self):
+        self.flush()
+        if self.parquet is not None:
+            self.parquet.close()
+
+    def flush(self):
+        if not self.rows and self.written:
+            return
+        df = pd.DataFrame(self.data, columns=self.columns)
+        if self.clean is not None:
+            df = self.clean(df)
+        if self.parquet is not None:
+            self.parquet.write(df)
+        else:
+            df.to_csv(self.path, mode='w' if not self.written else 'a', header=not self.written, index=False)
+        self.written += self.rows
+        self.data = {col: [] for col in self.columns}
+        self.rows = 0
+
+
+def ingest_candidates(path, output_path, chunk_rows=50_000):
+    buffer = ColumnBuffer(output_path, ['candidate_id', *CANDIDATE_FIELDS], _clean_candidates, chunk_rows)
+    for candidate_id, record in JsonObjectStream(path):
+        buffer.append([candidate_id, *(_get(record, field) for field in CANDIDATE_FIELDS.values())])
+    buffer.close()
+    return buffer.written
+
+
+def ingest_vacancies(path, output_path, chunk_rows=50_000):
+    buffer = ColumnBuffer(output_path, ['vacancy_id', *VACANCY_FIELDS], _clean_vacancies, chunk_rows)
+    for vacancy_id, record in JsonObjectStream(path):
+        buffer.append([vacancy_id, *(_get(record, field) for field in VACANCY_FIELDS.values())])
+    buffer.close()
+    return buffer.written
+
+
+def ingest_prospects(path, output_path, chunk_rows=50_000):
+    buffer = ColumnBuffer(output_path, ['prospect_id', *PROSPECT_FIELDS], chunk_rows=chunk_rows)
+    for prospect_id, record in JsonObjectStream(path):
+        for prospect in record.get('prospects') or []:
+            buffer.append([prospect_id, *(_get(prospect, field) for field in PROSPECT_FIELDS.values())])
+    buffer.close()
+    return buffer.written
+
+
+def ingest(raw_dir="data/raw", processed_dir="data/processed", chunk_rows=50_000, fmt="parquet"):
+    os.makedirs(processed_dir, exist_ok=True)
+    steps = {
+        "candidates": ingest_candidates,
+        "vacancies": ingest_vacancies,
+        "prospects": ingest_prospects,
+    }
+    counts = {}
+    for name, ingest_fn in steps.items():
+        counts[name] = ingest_fn(os.path.join(raw_dir, f"{name}.json"), os.path.join(processed_dir, f"{name}.{fmt}"), chunk_rows)
+        logging.info(f"{name}: {counts[name]} linhas gravadas em {processed_dir}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte os JSON brutos da Decision em data/processed/* em blocos.")
+    parser.add_argument("--raw-dir", default="data/raw")
+    parser.add_argument("--processed-dir", default="data/processed")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    ingest(args.raw_dir, args.processed_dir, args.chunk_rows, args.format)
+
+
+if __name__ == "__main__":
+    main()
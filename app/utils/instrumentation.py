@@ -0,0 +1,97 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+_NULL_STAGE = nullcontext()
+
+
+def _max_rss_mib():
+    # Pico de RSS do processo inteiro desde o início. O módulo resource não existe no Windows:
+    # lá não há medida de RSS e o campo fica None.
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS.
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2**20
+
+
+class StageTimer:
+    # Mede tempo de parede, tempo de CPU, linhas/s e pico de memória por etapa. Desligado,
+    # stage() devolve um nullcontext compartilhado e record() retorna de imediato.
+    # Com trace_memory o pico vem do tracemalloc (alocações Python/numpy, mais lento); sem ele,
+    # ru_maxrss só informa o pico do processo inteiro, então cada etapa registra esse pico
+    # (process_peak_rss_mib) e quanto ele subiu durante a etapa (rss_peak_growth_mib).
+    def __init__(self, enabled=True, trace_memory=False, log_path=None):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.log_path = log_path
+        self.records = []
+        self._stack = []
+
+    def _write(self, record):
+        self.records.append(record)
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._stage(name, rows)
+
+    @contextmanager
+    def _stage(self, name, rows):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        frame = {"child_peak": 0, "start_traced": tracemalloc.get_traced_memory()[0] if self.trace_memory else 0,
+                 "start_rss": None if self.trace_memory else _max_rss_mib()}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield frame
+        finally:
+            wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+            self._stack.pop()
+            record = {"stage": name, "depth": len(self._stack), "wall_s": wall, "cpu_s": cpu,
+                      "rows": rows if rows is not None else frame.get("rows")}
+            if self.trace_memory:
+                # reset_peak das etapas internas apaga o pico da externa; por isso o pico
+                # das filhas é propagado para cima.
+                peak = max(tracemalloc.get_traced_memory()[1], frame["child_peak"])
+                record["peak_mib"] = (peak - frame["start_traced"]) / 2**20
+                if self._stack:
+                    self._stack[-1]["child_peak"] = max(self._stack[-1]["child_peak"], peak)
+            else:
+                peak_rss = _max_rss_mib()
+                record["process_peak_rss_mib"] = peak_rss
+                record["rss_peak_growth_mib"] = peak_rss - frame["start_rss"] if peak_rss is not None else None
+            record["rows_per_s"] = record["rows"] / wall if record["rows"] and wall > 0 else None
+            self._write(record)
+
+    def record(self, name, wall, cpu=None, rows=None, **extra):
+        # Etapas medidas fora do timer (ex.: fit de cada modelo numa thread).
+        if not self.enabled:
+            return
+        self._write({"stage": name, "depth": len(self._stack), "wall_s": wall, "cpu_s": cpu, "rows": rows,
+                     "rows_per_s": rows / wall if rows and wall > 0 else None, **extra})
+
+    def to_dict(self):
+        return {"stages": list(self.records), "total_wall_s": sum(r["wall_s"] for r in self.records if r["depth"] == 0)}
+
+    def to_frame(self):
+        return pd.DataFrame(self.records)
+
+    def stop(self):
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+NULL_TIMER = StageTimer(enabled=False)
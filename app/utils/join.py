@@ -0,0 +1,211 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_store import PROCESSED_DIR, load_processed, read_table, save_processed, to_columnar
+
+MISSING_VALUE = 'Nao informado'
+
+STATUS_GROUPS = {
+    'Em processo seletivo': ['Prospect', 'Inscrito', 'Encaminhado ao Requisitante', 'Entrevista Técnica',
+                             'Entrevista com Cliente', 'Em avaliação pelo RH'],
+    'Aprovado': ['Aprovado', 'Contratado pela Decision', 'Contratado como Hunting', 'Encaminhar Proposta',
+                 'Proposta Aceita', 'Documentação PJ', 'Documentação CLT', 'Documentação Cooperado'],
+    'Reprovado': ['Não Aprovado pelo Cliente', 'Não Aprovado pelo RH', 'Não Aprovado pelo Requisitante', 'Recusado'],
+    'Desistiu': ['Desistiu', 'Desistiu da Contratação', 'Sem interesse nesta vaga'],
+}
+STATUS_TO_GROUP = {status: group for group, statuses in STATUS_GROUPS.items() for status in statuses}
+
+KEY_COLS = ['vacancy_id', 'candidate_id']
+
+
+def group_status(status):
+    return STATUS_TO_GROUP.get(status, 'Outro')
+
+
+def contract_type(value):
+    if isinstance(value, str) and 'CLT' in value:
+        return 'CLT'
+    if isinstance(value, str) and 'PJ' in value:
+        return 'PJ'
+    return value
+
+
+def _map_categories(values, fn):
+    # Aplica fn apenas ao vocabulário da coluna categórica e remapeia os códigos.
+    mapped = [fn(category) for category in values.cat.categories]
+    codes, uniques = pd.factorize(pd.Series(mapped, dtype=object))
+    lookup = np.append(codes, -1)
+    new_codes = lookup[values.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=pd.Index(uniques, dtype=object)), index=values.index)
+
+
+def _fill_missing(values):
+    if MISSING_VALUE not in values.cat.categories:
+        values = values.cat.add_categories([MISSING_VALUE])
+    return values.fillna(MISSING_VALUE)
+
+
+def _delta_positions(joined, delta):
+    # Posição de cada linha do delta na ordem da base: a mesma da linha que substitui, ou logo
+    # após a última linha da sua vaga; vagas novas vão para o fim.
+    positions = np.arange(len(joined), dtype=float)
+    old = pd.Series(positions, index=pd.MultiIndex.from_frame(joined[KEY_COLS]))
+    old = old[~old.index.duplicated(keep='last')]
+    last_of_vacancy = pd.Series(positions, index=joined['vacancy_id'].to_numpy()).groupby(level=0).max() + 0.5
+    delta_pos = old.reindex(pd.MultiIndex.from_frame(delta[KEY_COLS])).to_numpy()
+    new = np.isnan(delta_pos)
+    delta_pos[new] = last_of_vacancy.reindex(delta.loc[new, 'vacancy_id'].to_numpy()).fillna(len(joined)).to_numpy()
+    return delta_pos
+
+
+def apply_delta(joined, delta):
+    # Para linhas já juntadas (ex.: prospects recém rotulados no treino): a última versão de cada
+    # par substitui as linhas dele, na mesma ordem de ProspectJoiner.update.
+    delta = delta.drop_duplicates(subset=KEY_COLS, keep='last').reset_index(drop=True)
+    stale = pd.MultiIndex.from_frame(joined[KEY_COLS]).isin(pd.MultiIndex.from_frame(delta[KEY_COLS]))
+    updated = pd.concat([joined.loc[~stale], delta], ignore_index=True)
+    order = np.argsort(np.concatenate([np.flatnonzero(~stale).astype(float), _delta_positions(joined, delta)]), kind='stable')
+    return updated.iloc[order].reset_index(drop=True)
+
+
+class ProspectJoiner:
+    # Mantém candidatos e vagas indexados por ID para juntar apenas os prospects
+    # novos ou alterados à base já processada.
+    def __init__(self, candidates, vacancies):
+        self.candidates = self._prepare_table(candidates, 'candidate_id')
+        vacancies = self._prepare_table(vacancies, 'vacancy_id')
+        vacancies['vacancy_contract_type'] = _map_categories(vacancies['vacancy_contract_type'], contract_type)
+        self.vacancies = vacancies
+
+    def _prepare_table(self, df, key):
+        df = to_columnar(df)
+        return df.drop_duplicates(subset=key, keep='last').set_index(key)
+
+    def upsert_candidates(self, candidates):
+        candidates = self._prepare_table(candidates, 'candidate_id')
+        self.candidates = pd.concat([self.candidates.drop(candidates.index, errors='ignore'), candidates])
+        return candidates.index
+
+    def upsert_vacancies(self, vacancies):
+        vacancies = self._prepare_table(vacancies, 'vacancy_id')
+        vacancies['vacancy_contract_type'] = _map_categories(vacancies['vacancy_contract_type'], contract_type)
+        self.vacancies = pd.concat([self.vacancies.drop(vacancies.index, errors='ignore'), vacancies])
+        return vacancies.index
+
+    def _clean(self, df):
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = _fill_missing(df[col])
+        return df
+
+    def _attach(self, prospects):
+        vacancy_pos = self.vacancies.index.get_indexer(prospects['vacancy_id'])
+        candidate_pos = self.candidates.index.get_indexer(prospects['candidate_id'])
+        keep = (vacancy_pos >= 0) & (candidate_pos >= 0)
+
+        vacancies = self.vacancies.iloc[vacancy_pos[keep]]
+        candidates = self.candidates.iloc[candidate_pos[keep]]
+        prospects = prospects.loc[keep, [col for col in prospects.columns if col not in KEY_COLS]]
+        df = pd.concat([
+            vacancies.reset_index(),
+            prospects.reset_index(drop=True),
+            candidates.reset_index().drop(columns='candidate_id'),
+        ], axis=1)
+        df.insert(1, 'candidate_id', candidates.index.to_numpy())
+        return self._clean(df)
+
+    def _prepare_prospects(self, prospects):
+        prospects = to_columnar(prospects).rename(columns={'prospect_id': 'vacancy_id', 'prospect_candidate_code': 'candidate_id'})
+        prospects['prospect_candidate_status'] = _map_categories(prospects['prospect_candidate_status'], group_status)
+        return prospects.reset_index(drop=True)
+
+    def join(self, prospects):
+        # Como os merges do notebook, candidaturas repetidas do mesmo par (vaga, candidato) são mantidas.
+        return self._attach(self._prepare_prospects(prospects))
+
+    def _refresh(self, joined, mask):
+        # Reconstrói as linhas afetadas mantendo os campos do prospect já agrupados.
+        prospect_cols = [col for col in joined.columns if col.startswith('prospect_')]
+        return self._attach(joined.loc[mask, KEY_COLS + prospect_cols].reset_index(drop=True))
+
+    def update(self, joined, prospects=None, candidates=None, vacancies=None):
+        # As linhas saem na ordem da base completa (agrupadas por vaga), para que as janelas
+        # deslizantes do treino vejam a mesma sequência de um rebuild.
+        stale = np.zeros(len(joined), dtype=bool)
+        refresh = np.zeros(len(joined), dtype=bool)
+        parts, positions = [], []
+        n_new = 0
+
+        if candidates is not None:
+            refresh |= joined['candidate_id'].isin(self.upsert_candidates(candidates)).to_numpy()
+        if vacancies is not None:
+            refresh |= joined['vacancy_id'].isin(self.upsert_vacancies(vacancies)).to_numpy()
+
+        if prospects is not None:
+            # No delta, cada par vale pela última versão e substitui todas as linhas do par na base.
+            prospects = self._prepare_prospects(prospects).drop_duplicates(subset=KEY_COLS, keep='last')
+            delta = self._attach(prospects.reset_index(drop=True))
+            delta_keys = pd.MultiIndex.from_frame(delta[KEY_COLS])
+            joined_keys = pd.MultiIndex.from_frame(joined[KEY_COLS])
+            stale |= joined_keys.isin(delta_keys)
+            n_new = int((~delta_keys.isin(joined_keys)).sum())
+            parts.append(delta)
+            positions.append(_delta_positions(joined, delta))
+
+        refresh &= ~stale
+        if refresh.any():
+            parts.append(self._refresh(joined, refresh))
+            positions.append(np.flatnonzero(refresh).astype(float))
+
+        kept = ~(stale | refresh)
+        logging.info(f"Base atualizada: {int(stale.sum())} linhas substituídas, {int(refresh.sum())} reconstruídas, "
+                     f"{n_new} novas")
+        updated = pd.concat([joined.loc[kept]] + parts, ignore_index=True)
+        order = np.argsort(np.concatenate([np.flatnonzero(kept).astype(float)] + positions), kind='stable')
+        return updated.iloc[order].reset_index(drop=True)
+
+
+def build_joined(processed_dir=PROCESSED_DIR):
+    joiner = ProspectJoiner(load_processed('candidates', processed_dir), load_processed('vacancies', processed_dir))
+    return joiner, joiner.join(load_processed('prospects', processed_dir))
+
+
+def update_joined(processed_dir=PROCESSED_DIR, prospects=None, candidates=None, vacancies=None):
+    joiner = ProspectJoiner(load_processed('candidates', processed_dir), load_processed('vacancies', processed_dir))
+    joined = load_processed('df', processed_dir)
+    joined = joiner.update(joined, prospects=prospects, candidates=candidates, vacancies=vacancies)
+
+    if candidates is not None:
+        save_processed(joiner.candidates.reset_index(), 'candidates', processed_dir)
+    if vacancies is not None:
+        save_processed(joiner.vacancies.reset_index(), 'vacancies', processed_dir)
+    save_processed(joined, 'df', processed_dir)
+    return joined
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera ou atualiza a base df (vagas x prospects x candidatos).")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR)
+    parser.add_argument("--prospects", help="Prospects novos ou alterados (.parquet ou .csv).")
+    parser.add_argument("--candidates", help="Candidatos novos ou alterados.")
+    parser.add_argument("--vacancies", help="Vagas novas ou alteradas.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    deltas = {name: read_table(path) for name, path in
+              (("prospects", args.prospects), ("candidates", args.candidates), ("vacancies", args.vacancies)) if path}
+
+    if not os.path.exists(os.path.join(args.processed_dir, "df.parquet")):
+        _, joined = build_joined(args.processed_dir)
+        save_processed(joined, 'df', args.processed_dir)
+        logging.info(f"Base completa gerada com {len(joined)} linhas")
+    if deltas:
+        update_joined(args.processed_dir, **deltas)
+
+
+if __name__ == "__main__":
+    main()
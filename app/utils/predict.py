@@ -1,54 +1,201 @@
+import copy
+import tempfile
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 import joblib
 import os
 import logging
+import time
 import warnings
-import matplotlib.pyplot as plt
-import seaborn as sns
-import xgboost as xgb
-from datetime import datetime
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    confusion_matrix, roc_auc_score, roc_curve, auc
-)
-from sklearn.model_selection import train_test_split
-from imblearn.over_sampling import SMOTE
+from multiprocessing import TimeoutError as PoolTimeoutError
+from multiprocessing import get_context
+from multiprocessing.pool import ThreadPool
+from sklearn.metrics import roc_auc_score, roc_curve, auc
+from sklearn.base import clone
+from sklearn.model_selection import GroupKFold, KFold, train_test_split
+from joblib import Parallel, delayed
+from app.utils.correlation import CorrelationFilter
+from app.utils.instrumentation import NULL_TIMER, StageTimer
+from app.utils.ranking_metrics import ranking_metrics
+from app.utils.scoring import (ARTIFACT_FILE, DENSE_ONLY_MODELS, FEATURE_ENGINEER_FILE, TEXT_FEATURES_FILE, CandidateScorer,
+                               _window_view)
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+LEADERBOARD_FILE = "tuning_leaderboard.csv"
+CV_RESULTS_FILE = "cv_results.csv"
+PRECISION_AT = (10, 100, 1000)
+
+
+def _importance_weights(model, sample_weight):
+    # class_weight='balanced' é calculado sobre as contagens já subamostradas, o que por si só
+    # desfaz a subamostragem dos negativos; somar o peso 1/r por cima pesaria cada negativo
+    # mantido 1/r vezes mais do que num fit balanceado com a base completa.
+    if getattr(model, "class_weight", None) in ("balanced", "balanced_subsample"):
+        return None
+    return sample_weight
+
+
+def _fit_fold(model, data, sequence_length, y, train_pos, test_pos, densify, sample_weight=None):
+    # Roda num processo separado: data chega como memmap somente leitura (ou CSR com arrays
+    # memmap) e as janelas são views locais, então a matriz não é copiada por fold.
+    X = data if sp.issparse(data) else _window_view(data, sequence_length)
+    X_train, X_test = X[train_pos], X[test_pos]
+    if densify:
+        X_train, X_test = X_train.toarray(), X_test.toarray()
+    start = time.perf_counter()
+    model.fit(X_train, y[train_pos], sample_weight=sample_weight)
+    return model.predict_proba(X_test)[:, 1], time.perf_counter() - start
+
+
+def _fit_and_predict(model, X_train, y_train, X_test, densify, sample_weight=None):
+    if densify:
+        X_train, X_test = X_train.toarray(), X_test.toarray()
+    # Só o tempo de parede é medido por modelo: RandomForest e XGBoost usam threads próprias, que
+    # thread_time não enxerga, e process_time somaria os modelos que treinam ao lado.
+    start = time.perf_counter()
+    model.fit(X_train, y_train, sample_weight=sample_weight)
+    fitted = time.perf_counter()
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = model.predict(X_test)
+    timings = {"fit": fitted - start, "predict": time.perf_counter() - fitted}
+    return model, y_pred_proba, y_pred, timings
+
+
+class CandidateModelPipeline(CandidateScorer):
+    def __init__(self, n_jobs=None, model_timeout=None, executor="thread"):
+        super().__init__()
+        # Estimadores importados só aqui: quem apenas pontua usa CandidateScorer e não os carrega.
+        import xgboost as xgb
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LogisticRegression
 
-class CandidateModelPipeline:
-    def __init__(self):
         self.models = [
-            self._wrap_model(RandomForestClassifier(n_estimators=100, class_weight='balanced'), "RandomForest"),
-            self._wrap_model(xgb.XGBClassifier(objective='binary:logistic', n_estimators=200, learning_rate=0.05, eval_metric='logloss'), "XGBoost"),
+            self._wrap_model(RandomForestClassifier(n_estimators=100, class_weight='balanced'), "RandomForest", core_weight=1),
+            self._wrap_model(xgb.XGBClassifier(objective='binary:logistic', n_estimators=200, learning_rate=0.05, eval_metric='logloss'), "XGBoost", core_weight=1),
             self._wrap_model(LogisticRegression(max_iter=1000, class_weight='balanced'), "LogisticRegression"),
         ]
+        self.n_jobs = n_jobs
+        self.model_timeout = model_timeout
+        self.executor = executor
+        self.leaderboard = None
+        self.cv_results = None
+        self.timings = None
+        self.metrics = {}
+
+    def _wrap_model(self, model, name, core_weight=0):
+        # core_weight=0 indica um modelo que treina em uma única thread (lbfgs binário).
+        return {"model": model, "name": name, "accepts_sparse": name not in DENSE_ONLY_MODELS, "core_weight": core_weight}
+
+    def _core_budget(self):
+        total = self.n_jobs or os.cpu_count() or 1
+        single = [entry for entry in self.models if entry["core_weight"] == 0]
+        weights = sum(entry["core_weight"] for entry in self.models)
+        spare = max(total - len(single), len(self.models) - len(single))
+
+        budget = {entry["name"]: 1 for entry in single}
+        parallel = [entry for entry in self.models if entry["core_weight"] > 0]
+        for entry in parallel:
+            budget[entry["name"]] = max(1, spare * entry["core_weight"] // weights)
+        for entry in parallel[:spare - sum(budget[e["name"]] for e in parallel)]:
+            budget[entry["name"]] += 1
+        return budget
+
+    def _train_concurrently(self, X_train, y_train, X_test, sample_weight=None):
+        # Com model_timeout (ou executor="process") os modelos treinam em processos (spawn, seguro
+        # com as threads OpenMP do XGBoost), e terminate() encerra o que estourar o prazo; uma
+        # thread não pode ser interrompida e continuaria ocupando os núcleos em segundo plano.
+        budget = self._core_budget()
+        deadline = time.monotonic() + self.model_timeout if self.model_timeout else None
+        if self.executor == "process" or deadline:
+            pool = get_context("spawn").Pool(len(self.models))
+        else:
+            pool = ThreadPool(len(self.models))
+
+        futures = {}
+        for entry in self.models:
+            entry["model"].set_params(n_jobs=budget[entry["name"]])
+            densify = sp.issparse(X_train) and not entry["accepts_sparse"]
+            weights = _importance_weights(entry["model"], sample_weight)
+            futures[entry["name"]] = pool.apply_async(_fit_and_predict, (entry["model"], X_train, y_train, X_test, densify, weights))
 
-    def _wrap_model(self, model, name):
-        return {"model": model, "name": name}
+        # Um modelo que estoura o prazo ou falha é descartado sem derrubar os demais; o motivo fica
+        # em failures para o erro de _fit_models quando nenhum sobra.
+        results, failures = {}, {}
+        try:
+            for name, future in futures.items():
+                timeout = max(deadline - time.monotonic(), 0) if deadline else None
+                try:
+                    results[name] = future.get(timeout=timeout)
+                except PoolTimeoutError:
+                    failures[name] = f"excedeu o tempo limite de {self.model_timeout}s"
+                    logging.warning(f"{name} {failures[name]} e foi descartado")
+                    continue
+                except Exception as error:
+                    failures[name] = f"falhou com {type(error).__name__}: {error}"
+                    logging.error(f"{name} {failures[name]}")
+                    continue
+                logging.info(f"{name} treinado em {results[name][3]['fit']:.1f}s com {budget[name]} núcleo(s)")
+        finally:
+            pool.terminate()
+            pool.join()
+        return results, failures
 
-    def _prepare_ml_data(self, df, target_column, sequence_length):
-        data = df.drop(columns=[target_column]).values
+    def _downsample_negatives(self, train_pos, y_train, negative_rate, reweight, random_state=42):
+        # Mantém todos os aprovados e uma fração negative_rate dos demais. Com reweight, cada
+        # negativo mantido pesa 1/negative_rate no fit (exceto nos modelos com class_weight
+        # 'balanced', ver _importance_weights); sem reweight, as probabilidades são corrigidas
+        # na predição (ver _recalibrate).
+        rng = np.random.default_rng(random_state)
+        keep = (y_train == 1) | (rng.random(len(y_train)) < negative_rate)
+        sample_weight = None
+        if reweight:
+            sample_weight = np.where(y_train[keep] == 1, 1.0, 1.0 / negative_rate)
+        logging.info(f"Negativos subamostrados a {negative_rate:.0%}: {int(keep.sum())} de {len(keep)} linhas de treino")
+        return train_pos[keep], sample_weight
+
+    def _tune_models(self, X_train, y_train, models_dir, tuning=None):
+        from app.utils.tuning import HyperparameterSearch
+
+        # Escolhe os hiperparâmetros só com o treino; o teste continua intocado para as métricas.
+        search = HyperparameterSearch(**{"n_jobs": self.n_jobs, **(tuning or {})}).fit(self.models, X_train, y_train)
+        for entry in self.models:
+            entry["model"] = search.best_estimator(entry)
+            logging.info(f"{entry['name']}: melhores parâmetros {search.best_params.get(entry['name'])}")
+        self.leaderboard = search.leaderboard
+        os.makedirs(models_dir, exist_ok=True)
+        self.leaderboard.to_csv(os.path.join(models_dir, LEADERBOARD_FILE), index=False)
+
+    def _prepare_ml_data(self, df, target_column, sequence_length, dtype=np.float32):
+        data = self._as_window_source(df.drop(columns=[target_column]).values, dtype)
         target = df[target_column].values
-        X, y = [], []
-        for i in range(len(data) - sequence_length):
-            X.append(data[i:i+sequence_length])
-            y.append(target[i + sequence_length])
-        X = np.array(X).reshape(len(X), -1)
-        y = np.array(y)
+        X = self._build_windows(data, sequence_length)
+        y = np.array(target[sequence_length:])
         return X, y
 
-    def _remove_high_correlation(self, df, threshold=0.9):
-        corr = df.corr()
-        upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
-        to_drop = [col for col in upper.columns if any(upper[col] > threshold)]
-        return df.drop(columns=to_drop)
+    def _iter_ml_batches(self, df, target_column, sequence_length, batch_size, dtype=np.float32):
+        data = self._as_window_source(df.drop(columns=[target_column]).values, dtype)
+        return self._iter_windows(data, sequence_length, batch_size, target=df[target_column].values)
+
+    def _remove_high_correlation(self, df, threshold=0.9, chunk_size=50_000, dropped_columns=None):
+        if dropped_columns is not None:
+            self.dropped_columns = list(dropped_columns)
+            return df.drop(columns=self.dropped_columns, errors='ignore')
+        correlation_filter = CorrelationFilter(threshold).fit(df, chunk_size=chunk_size)
+        self.dropped_columns = correlation_filter.columns_to_drop()
+        return df.drop(columns=self.dropped_columns)
+
+    def _remove_high_correlation_sparse(self, X, feature_names, threshold=0.9, chunk_size=50_000, dropped_columns=None):
+        if dropped_columns is None:
+            dropped_columns = CorrelationFilter(threshold).fit(X, feature_names, chunk_size=chunk_size).columns_to_drop()
+        self.dropped_columns = list(dropped_columns)
+        keep = [i for i, name in enumerate(feature_names) if name not in set(self.dropped_columns)]
+        return X[:, keep], [feature_names[i] for i in keep]
 
     def _plot_roc_curve(self, y_true, y_scores, model_name):
+        import matplotlib.pyplot as plt
+
         fpr, tpr, _ = roc_curve(y_true, y_scores)
         roc_auc = auc(fpr, tpr)
 
@@ -62,15 +209,12 @@ class CandidateModelPipeline:
         plt.grid(True)
         plt.show()
 
-    def _plot_precision_at_k(self, ranked_candidates, max_k=1000):
-        precisions = []
-        ks = range(1, max_k + 1)
-        aprovados = ranked_candidates['approved'].values
-        for k in ks:
-            precisions.append(np.sum(aprovados[:k]) / k)
+    def _plot_precision_at_k(self, metrics):
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(10, 5))
-        plt.plot(ks, precisions, label='Precision@K', color='blue')
-        plt.axhline(y=ranked_candidates['approved'].mean(), color='gray', linestyle='--', label='Base approval rate')
+        plt.plot(metrics['k'], metrics['precision'], label='Precision@K', color='blue')
+        plt.axhline(y=metrics['base_rate'], color='gray', linestyle='--', label='Base approval rate')
         plt.xlabel('Top K ranked candidates')
         plt.ylabel('Precision@K')
         plt.title('Ranking Effectiveness')
@@ -78,59 +222,376 @@ class CandidateModelPipeline:
         plt.grid(True)
         plt.show()
 
-    def run(self, df, target_column, models_dir="models", sequence_length=10, plot_metrics=False):
-        logging.info("Iniciando pipeline...")
+    def _save_artifact(self, models_dir, feature_engineer):
+        os.makedirs(models_dir, exist_ok=True)
+        joblib.dump(self.model, os.path.join(models_dir, f"{self.model_name}.joblib"))
+        if feature_engineer is not None:
+            feature_engineer.save(os.path.join(models_dir, FEATURE_ENGINEER_FILE))
+        if self.text_features is not None:
+            self.text_features.save(os.path.join(models_dir, TEXT_FEATURES_FILE))
+        joblib.dump({
+            "model_name": self.model_name,
+            "feature_columns": self.feature_columns,
+            "dropped_columns": self.dropped_columns,
+            "target_column": self.target_column,
+            "sequence_length": self.sequence_length,
+            "sparse": self.sparse,
+            "dtype": np.dtype(self.dtype).name,
+            "negative_rate": self.negative_rate,
+            "calibration_rate": self.calibration_rate,
+            "roc_auc": self.roc_auc,
+            "text_features": self.text_features is not None,
+        }, os.path.join(models_dir, ARTIFACT_FILE))
+        logging.info(f"Modelo salvo como {self.model_name}.joblib")
+
+    def _warm_start_fit(self, X, y, n_estimators, sample_weight=None):
+        # Continua o modelo salvo em vez de treinar do zero: XGBoost ganha n_estimators árvores
+        # sobre o booster atual, RandomForest ganha n_estimators árvores novas e a regressão
+        # logística parte dos coeficientes atuais.
+        model = self.model
+        class_weight = getattr(model, "class_weight", None)
+        if isinstance(class_weight, str):
+            # 'balanced' com warm_start recalcularia os pesos a cada fit (o sklearn avisa): os pesos
+            # ficam explícitos, calculados sobre o lote novo que treina as árvores/coeficientes novos.
+            from sklearn.utils.class_weight import compute_class_weight
+
+            classes = np.unique(y)
+            model.set_params(class_weight=dict(zip(classes, compute_class_weight("balanced", classes=classes, y=y))))
+        try:
+            self._continue_fit(model, X, y, n_estimators, sample_weight)
+        finally:
+            if isinstance(class_weight, str):
+                model.set_params(class_weight=class_weight)
+        return model
+
+    def _continue_fit(self, model, X, y, n_estimators, sample_weight):
+        import xgboost as xgb
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.linear_model import LogisticRegression
+
+        if isinstance(model, xgb.XGBClassifier):
+            booster = model.get_booster()
+            model.set_params(n_estimators=n_estimators)
+            model.fit(X, y, sample_weight=sample_weight, xgb_model=booster)
+        elif isinstance(model, RandomForestClassifier):
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + n_estimators)
+            model.fit(X, y, sample_weight=sample_weight)
+            model.set_params(warm_start=False)
+        elif isinstance(model, LogisticRegression):
+            model.set_params(warm_start=True)
+            model.fit(X, y, sample_weight=sample_weight)
+            model.set_params(warm_start=False)
+        else:
+            raise ValueError(f"{self.model_name} não suporta atualização incremental.")
 
-        df = self._remove_high_correlation(df)
-        X, y = self._prepare_ml_data(df, target_column, sequence_length)
+    def update(self, df, models_dir="models", n_estimators=50, max_auc_drop=0.02, validation_size=0.2, random_state=42):
+        # Atualiza o modelo salvo com prospects recém rotulados. Se o AUC de validação do modelo
+        # atualizado ficar abaixo do AUC de treino ou do modelo anterior (menos max_auc_drop), a
+        # atualização é descartada e o status "retrain" pede um treino do zero.
+        if self.model is None:
+            raise RuntimeError("Nenhum modelo treinado: execute run() ou load() antes de update().")
+        labels = self._labels(df)
+        if labels is None:
+            raise ValueError(f"Os dados novos precisam de {self.target_column} ou prospect_candidate_status.")
 
-        df = df.iloc[-X.shape[0]:].copy()
-        X = pd.DataFrame(X, index=df.index)
-        y = pd.Series(y, index=df.index)
+        X = self._design_matrix(df)
+        y = labels.to_numpy()[self.sequence_length:]
+        train_pos, valid_pos = train_test_split(np.arange(X.shape[0]), test_size=validation_size, shuffle=True,
+                                                random_state=random_state)
+        sample_weight = None
+        if self.negative_rate < 1:
+            train_pos, sample_weight = self._downsample_negatives(train_pos, y[train_pos], self.negative_rate,
+                                                                  reweight=self.calibration_rate >= 1)
 
-        X['original_index'] = df.index
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=True, random_state=42)
+        report = {"model_name": self.model_name, "rows": int(X.shape[0]), "reference_auc": self.roc_auc}
+        single_class = len(np.unique(y[valid_pos])) < 2
+        if not single_class:
+            report["previous_auc"] = roc_auc_score(y[valid_pos], self.model.predict_proba(X[valid_pos])[:, 1])
 
-        X_train_index = X_train['original_index']
-        X_test_index = X_test['original_index']
-        X_train = X_train.drop(columns=['original_index'])
-        X_test = X_test.drop(columns=['original_index'])
+        # O fit com warm start altera o modelo no lugar; a cópia permite desfazer a atualização.
+        previous = copy.deepcopy(self.model)
+        start = time.perf_counter()
+        self._warm_start_fit(X[train_pos], y[train_pos], n_estimators, _importance_weights(self.model, sample_weight))
+        report["seconds"] = time.perf_counter() - start
+
+        if single_class:
+            logging.warning("Validação com uma única classe: atualização aceita sem checar o AUC")
+        else:
+            report["updated_auc"] = roc_auc_score(y[valid_pos], self.model.predict_proba(X[valid_pos])[:, 1])
+            drifted = self.roc_auc is not None and report["updated_auc"] < self.roc_auc - max_auc_drop
+            degraded = report["updated_auc"] < report["previous_auc"] - max_auc_drop
+            if drifted or degraded:
+                self.model = previous
+                report["status"] = "retrain"
+                logging.warning(f"AUC de validação {report['updated_auc']:.4f} (antes {report['previous_auc']:.4f}, "
+                                f"treino {self.roc_auc}): atualização descartada, é preciso treinar do zero")
+                return report
+
+        self._save_artifact(models_dir, self.feature_engineer)
+        report["status"] = "updated"
+        logging.info(f"{self.model_name} atualizado com {len(train_pos)} linhas em {report['seconds']:.1f}s")
+        return report
+
+    def _label_leaking_columns(self, target_column, feature_engineer, columns):
+        # Sem janelas, as demais categorias da coluna de origem do alvo revelam o rótulo da própria linha.
+        if feature_engineer is None:
+            return []
+        sources = feature_engineer.feature_sources()
+        source = sources.get(target_column)
+        return [col for col in columns if col != target_column and source is not None and sources.get(col) == source]
+
+    def _fit_models(self, X, y, index, models_dir, plot_metrics, feature_engineer, max_k=1000, negative_rate=None, reweight=True,
+                    tune=False, tuning=None, timer=NULL_TIMER):
+        train_pos, test_pos = train_test_split(np.arange(X.shape[0]), test_size=0.2, shuffle=True, random_state=42)
+        # O teste mantém a distribuição original para que as métricas sejam comparáveis.
+        sample_weight = None
+        self.negative_rate = negative_rate or 1.0
+        self.calibration_rate = 1.0
+        if self.negative_rate < 1:
+            train_pos, sample_weight = self._downsample_negatives(train_pos, y[train_pos], self.negative_rate, reweight)
+            self.calibration_rate = 1.0 if reweight else self.negative_rate
+        X_train, X_test = X[train_pos], X[test_pos]
+        y_train, y_test = y[train_pos], y[test_pos]
+        X_test_index = index[test_pos]
 
         best_model = None
         best_score = 0
         best_ranked = None
+        self.metrics = {}
 
-        for entry in self.models:
-            model = entry["model"]
-            name = entry["name"]
-
-            model.fit(X_train, y_train)
-            y_pred_proba = model.predict_proba(X_test)[:, 1]
-            y_pred = model.predict(X_test)
-            score = roc_auc_score(y_test, y_pred_proba)
+        if tune:
+            with timer.stage("tuning", rows=X_train.shape[0]):
+                self._tune_models(X_train, y_train, models_dir, tuning)
+        with timer.stage("train_models", rows=X_train.shape[0]):
+            results, failures = self._train_concurrently(X_train, y_train, X_test, sample_weight)
+            # Os modelos treinam em paralelo: cada um registra só o tempo de parede; o CPU total fica em train_models.
+            for name, (_, _, _, timings) in results.items():
+                timer.record(f"fit:{name}", timings["fit"], rows=X_train.shape[0])
+                timer.record(f"predict:{name}", timings["predict"], rows=X_test.shape[0])
+        if not results:
+            reasons = "; ".join(f"{name} {reason}" for name, reason in failures.items())
+            raise RuntimeError(f"Nenhum modelo foi treinado: {reasons}")
+        with timer.stage("ranking", rows=X_test.shape[0]):
+            for entry in self.models:
+                name = entry["name"]
+                if name not in results:
+                    continue
+                model, y_pred_proba, y_pred, _ = results[name]
+                y_pred_proba = self._recalibrate(y_pred_proba)
+                entry["model"] = model
+                score = roc_auc_score(y_test, y_pred_proba)
 
-            logging.info(f"{name} ROC-AUC: {score:.4f}")
-            if plot_metrics:
-                self._plot_roc_curve(y_test, y_pred_proba, name)
+                logging.info(f"{name} ROC-AUC: {score:.4f}")
+                if plot_metrics:
+                    self._plot_roc_curve(y_test, y_pred_proba, name)
 
-            ranked_candidates = pd.DataFrame({
-                'candidate_id': X_test_index,
-                'approval_probability': y_pred_proba,
-                'approved': y_test.values
-            }).sort_values(by='approval_probability', ascending=False)
+                ranked_candidates = pd.DataFrame({
+                    'candidate_id': X_test_index,
+                    'approval_probability': y_pred_proba,
+                    'approved': y_test
+                }, index=X_test_index).sort_values(by='approval_probability', ascending=False)
 
-            if plot_metrics:
-                self._plot_precision_at_k(ranked_candidates)
+                self.metrics[name] = {"roc_auc": score, **ranking_metrics(y_test, y_pred_proba, max_k=max_k)}
+                if plot_metrics:
+                    self._plot_precision_at_k(self.metrics[name])
 
-            if score > best_score:
-                best_score = score
-                best_model = model
-                best_model_name = name
-                best_ranked = ranked_candidates
+                if score > best_score:
+                    best_score = score
+                    best_model = model
+                    best_model_name = name
+                    best_ranked = ranked_candidates
 
         if best_model:
-            os.makedirs(models_dir, exist_ok=True)
-            joblib.dump(best_model, os.path.join(models_dir, f"{best_model_name}.joblib"))
-            logging.info(f"Modelo salvo como {best_model_name}.joblib")
+            self.model = best_model
+            self.model_name = best_model_name
+            self.roc_auc = best_score
+            with timer.stage("artifact"):
+                self._save_artifact(models_dir, feature_engineer)
 
         return best_model, best_ranked
+
+    def _cv_folds(self, n_windows, sequence_length, n_splits, groups=None):
+        # Folds contíguos (KFold sem embaralhar) ou por vaga (GroupKFold). Janelas de treino
+        # cujas linhas incluem o alvo de uma janela de teste são descartadas (purge), senão o
+        # status dessa linha vaza o rótulo do teste.
+        splitter = GroupKFold(n_splits=n_splits) if groups is not None else KFold(n_splits=n_splits)
+        for train_pos, test_pos in splitter.split(np.arange(n_windows), groups=groups):
+            if sequence_length:
+                test_rows = np.zeros(n_windows + sequence_length, dtype=bool)
+                test_rows[test_pos + sequence_length] = True
+                cumulative = np.concatenate([[0], np.cumsum(test_rows)])
+                train_pos = train_pos[cumulative[train_pos + sequence_length] == cumulative[train_pos]]
+            yield train_pos, test_pos
+
+    def _fold_metrics(self, y_true, y_score, max_k):
+        metrics = ranking_metrics(y_true, y_score, max_k=max_k)
+        row = {"roc_auc": roc_auc_score(y_true, y_score) if len(np.unique(y_true)) > 1 else np.nan}
+        for k in PRECISION_AT:
+            if k <= len(metrics["precision"]):
+                row[f"precision@{k}"] = metrics["precision"][k - 1]
+        row["map"] = metrics["map"]
+        return row
+
+    def _fit_models_cv(self, data, y, index, window, models_dir, feature_engineer, n_splits=5, groups=None, max_k=1000,
+                       negative_rate=None, reweight=True, timer=NULL_TIMER):
+        # data é a origem das janelas (densa, window=sequence_length) ou a matriz já janelada
+        # (CSR, window=0). Os folds rodam em processos; a origem densa vai para um memmap.
+        n_windows = y.shape[0]
+        folds = list(self._cv_folds(n_windows, self.sequence_length, n_splits, groups))
+        self.negative_rate = negative_rate or 1.0
+        self.calibration_rate = 1.0 if reweight or self.negative_rate >= 1 else self.negative_rate
+
+        with tempfile.TemporaryDirectory() as temp_folder:
+            shared = data
+            if not sp.issparse(data):
+                path = os.path.join(temp_folder, "window_source.joblib")
+                joblib.dump(np.ascontiguousarray(data), path)
+                shared = joblib.load(path, mmap_mode="r")
+
+            jobs, calls = [], []
+            for entry in self.models:
+                densify = sp.issparse(data) and not entry["accepts_sparse"]
+                for fold, (train_pos, test_pos) in enumerate(folds):
+                    sample_weight = None
+                    if self.negative_rate < 1:
+                        train_pos, sample_weight = self._downsample_negatives(train_pos, y[train_pos], self.negative_rate, reweight)
+                    model = clone(entry["model"]).set_params(n_jobs=1)
+                    jobs.append((entry["name"], fold, test_pos))
+                    calls.append(delayed(_fit_fold)(model, shared, window, y, train_pos, test_pos, densify,
+                                                    _importance_weights(model, sample_weight)))
+
+            # max_nbytes faz o joblib passar arrays grandes (inclusive os da CSR) por memmap.
+            n_jobs = self.n_jobs or os.cpu_count() or 1
+            with timer.stage("cross_validation", rows=n_windows):
+                outputs = Parallel(n_jobs=n_jobs, max_nbytes="1M", temp_folder=temp_folder)(calls)
+                for (name, fold, test_pos), (_, seconds) in zip(jobs, outputs):
+                    timer.record(f"fit:{name}", seconds, fold=fold, rows=n_windows - len(test_pos))
+
+        oof = {entry["name"]: np.full(n_windows, np.nan) for entry in self.models}
+        rows = []
+        for (name, fold, test_pos), (proba, seconds) in zip(jobs, outputs):
+            proba = self._recalibrate(proba)
+            oof[name][test_pos] = proba
+            rows.append({"model": name, "fold": fold, "n_test": len(test_pos), "fit_seconds": seconds,
+                         **self._fold_metrics(y[test_pos], proba, max_k)})
+        self.cv_results = pd.DataFrame(rows)
+        os.makedirs(models_dir, exist_ok=True)
+        self.cv_results.to_csv(os.path.join(models_dir, CV_RESULTS_FILE), index=False)
+
+        summary = self.cv_results.groupby("model")["roc_auc"].agg(["mean", "std"])
+        self.metrics = {}
+        for name, stats in summary.iterrows():
+            logging.info(f"{name} ROC-AUC ({n_splits} folds): {stats['mean']:.4f} ± {stats['std']:.4f}")
+            self.metrics[name] = {"roc_auc": stats["mean"], "roc_auc_std": stats["std"], **ranking_metrics(y, oof[name], max_k=max_k)}
+
+        # O melhor modelo pela média dos folds é re-treinado com todas as janelas.
+        best_name = summary["mean"].idxmax()
+        entry = next(entry for entry in self.models if entry["name"] == best_name)
+        train_pos, sample_weight = np.arange(n_windows), None
+        if self.negative_rate < 1:
+            train_pos, sample_weight = self._downsample_negatives(train_pos, y, self.negative_rate, reweight)
+        X = data if sp.issparse(data) else _window_view(data, window)
+        X_train = X[train_pos].toarray() if sp.issparse(X) and not entry["accepts_sparse"] else X[train_pos]
+        # Sozinho no refit, o modelo usa todos os núcleos, exceto a regressão logística (core_weight=0),
+        # para a qual n_jobs > 1 só cria processos sem ganho.
+        entry["model"].set_params(n_jobs=1 if entry["core_weight"] == 0 else self.n_jobs or os.cpu_count() or 1)
+        with timer.stage(f"fit:{best_name}", rows=len(train_pos)):
+            entry["model"].fit(X_train, y[train_pos], sample_weight=_importance_weights(entry["model"], sample_weight))
+
+        self.model = entry["model"]
+        self.model_name = best_name
+        self.roc_auc = summary.loc[best_name, "mean"]
+        with timer.stage("artifact"):
+            self._save_artifact(models_dir, feature_engineer)
+
+        ranked = pd.DataFrame({'candidate_id': index, 'approval_probability': oof[best_name], 'approved': y},
+                              index=index).sort_values(by='approval_probability', ascending=False)
+        return self.model, ranked
+
+    def _finish_run(self, result, timer, return_timings):
+        self.timings = timer.to_dict() if timer.enabled else None
+        return (*result, self.timings) if return_timings else result
+
+    def run(self, df, target_column, models_dir="models", sequence_length=10, plot_metrics=False, feature_engineer=None, dtype=np.float32,
+            dropped_columns=None, negative_rate=None, reweight=True, tune=False, tuning=None, cv=None, groups=None,
+            timer=None, return_timings=False):
+        # Com timer (ou return_timings) cada etapa registra tempo, CPU, linhas/s e memória;
+        # return_timings acrescenta o resumo ao retorno: (modelo, ranking, tempos).
+        timer = timer or (StageTimer() if return_timings else NULL_TIMER)
+        logging.info("Iniciando pipeline...")
+        if cv and tune:
+            raise ValueError("Use tune ou cv, não os dois: a busca usa seu próprio split de validação.")
+
+        with timer.stage("correlation_filter", rows=len(df)):
+            df = self._remove_high_correlation(df, dropped_columns=dropped_columns)
+        if not sequence_length:
+            df = df.drop(columns=self._label_leaking_columns(target_column, feature_engineer, df.columns))
+        self.feature_columns = [col for col in df.columns if col != target_column]
+        self.target_column = target_column
+        self.sequence_length = sequence_length
+        self.feature_engineer = feature_engineer
+        self.sparse = False
+        if cv:
+            with timer.stage("windowing", rows=len(df)):
+                data = self._as_window_source(df.drop(columns=[target_column]).values, dtype)
+                y = df[target_column].values[sequence_length:]
+            self.dtype = data.dtype
+            result = self._fit_models_cv(data, y, df.index[sequence_length:], sequence_length, models_dir, feature_engineer,
+                                         n_splits=cv, groups=None if groups is None else np.asarray(groups)[sequence_length:],
+                                         negative_rate=negative_rate, reweight=reweight, timer=timer)
+            return self._finish_run(result, timer, return_timings)
+        with timer.stage("windowing", rows=len(df)):
+            X, y = self._prepare_ml_data(df, target_column, sequence_length, dtype=dtype)
+        self.dtype = X.dtype
+
+        result = self._fit_models(X, y, df.index[-X.shape[0]:], models_dir, plot_metrics, feature_engineer,
+                                  negative_rate=negative_rate, reweight=reweight, tune=tune, tuning=tuning, timer=timer)
+        return self._finish_run(result, timer, return_timings)
+
+    def _sparse_target_position(self, feature_names, target_column, feature_engineer):
+        # Com até duas categorias o FeatureEngineer label-encoda o status e não existe a coluna
+        # one-hot do alvo; o rótulo sai então do código de 'Aprovado', como no caminho denso (app.train).
+        if target_column in feature_names:
+            return feature_names.index(target_column), None
+        encoder = feature_engineer.label_encoders.get("prospect_candidate_status") if feature_engineer is not None else None
+        if encoder is None or "prospect_candidate_status" not in feature_names or "Aprovado" not in encoder.classes_:
+            raise ValueError(f"Coluna alvo '{target_column}' ausente da matriz e não há status 'Aprovado' "
+                             "em prospect_candidate_status para derivá-la.")
+        return feature_names.index("prospect_candidate_status"), list(encoder.classes_).index("Aprovado")
+
+    def run_sparse(self, X, feature_names, target_column, models_dir="models", sequence_length=10, plot_metrics=False, feature_engineer=None,
+                   dropped_columns=None, negative_rate=None, reweight=True, tune=False, tuning=None, cv=None, groups=None,
+                   timer=None, return_timings=False):
+        timer = timer or (StageTimer() if return_timings else NULL_TIMER)
+        logging.info("Iniciando pipeline (matriz esparsa)...")
+        if cv and tune:
+            raise ValueError("Use tune ou cv, não os dois: a busca usa seu próprio split de validação.")
+
+        with timer.stage("correlation_filter", rows=X.shape[0]):
+            X, feature_names = self._remove_high_correlation_sparse(X, feature_names, dropped_columns=dropped_columns)
+        target_pos, approved_code = self._sparse_target_position(feature_names, target_column, feature_engineer)
+        leaking = self._label_leaking_columns(target_column, feature_engineer, feature_names) if not sequence_length else []
+        # O status label-encoded só serve de feature nas janelas (linhas anteriores), como no caminho denso.
+        derived = approved_code is not None and sequence_length
+        feature_pos = [i for i, name in enumerate(feature_names) if (i != target_pos or derived) and name not in leaking]
+        self.feature_columns = [feature_names[i] for i in feature_pos]
+        self.target_column = target_column
+        self.sequence_length = sequence_length
+        self.feature_engineer = feature_engineer
+        self.sparse = True
+        self.dtype = X.dtype
+
+        with timer.stage("windowing", rows=X.shape[0]):
+            target = X[:, target_pos].toarray().ravel()
+            target = (target == approved_code if approved_code is not None else target).astype(int)
+            X = self._build_sparse_windows(X[:, feature_pos], sequence_length)
+            y = target[sequence_length:]
+        if cv:
+            result = self._fit_models_cv(X, y, pd.RangeIndex(sequence_length, len(target)), 0, models_dir, feature_engineer,
+                                         n_splits=cv, groups=None if groups is None else np.asarray(groups)[sequence_length:],
+                                         negative_rate=negative_rate, reweight=reweight, timer=timer)
+            return self._finish_run(result, timer, return_timings)
+
+        result = self._fit_models(X, y, pd.RangeIndex(sequence_length, len(target)), models_dir, plot_metrics, feature_engineer,
+                                  negative_rate=negative_rate, reweight=reweight, tune=tune, tuning=tuning, timer=timer)
+        return self._finish_run(result, timer, return_timings)
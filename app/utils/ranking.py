@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+EMPTY_CANDIDATE = -1
+
+
+class TopKRanker:
+    # Mantém os K melhores candidatos de cada vaga em matrizes densas (vagas x K),
+    # usando seleção parcial (argpartition) a cada lote: memória O(vagas * K).
+    def __init__(self, vacancy_ids, k=20):
+        self.k = k
+        self.vacancy_ids = np.asarray(vacancy_ids)
+        self.vacancy_index = pd.Index(self.vacancy_ids)
+        self.scores = np.full((len(self.vacancy_ids), k), -np.inf, dtype=np.float32)
+        self.candidates = np.full((len(self.vacancy_ids), k), EMPTY_CANDIDATE, dtype=np.int64)
+
+    def add_vacancies(self, vacancy_ids):
+        vacancy_ids = np.asarray(vacancy_ids)
+        new_ids = pd.unique(vacancy_ids[self.vacancy_index.get_indexer(vacancy_ids) < 0])
+        if len(new_ids):
+            self.vacancy_ids = np.concatenate([self.vacancy_ids, new_ids])
+            self.vacancy_index = pd.Index(self.vacancy_ids)
+            self.scores = np.vstack([self.scores, np.full((len(new_ids), self.k), -np.inf, dtype=np.float32)])
+            self.candidates = np.vstack([self.candidates, np.full((len(new_ids), self.k), EMPTY_CANDIDATE, dtype=np.int64)])
+        return self
+
+    def _select(self, scores, candidates, k):
+        # Top-k por linha sem ordenar o restante.
+        if scores.shape[1] > k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, top, axis=1)
+            candidates = np.take_along_axis(candidates, top, axis=1)
+        return scores, candidates
+
+    def _merge(self, rows, scores, candidates):
+        scores, candidates = self._select(scores, candidates, self.k)
+        merged_scores = np.concatenate([self.scores[rows], scores], axis=1)
+        merged_candidates = np.concatenate([self.candidates[rows], candidates], axis=1)
+        self.scores[rows], self.candidates[rows] = self._select(merged_scores, merged_candidates, self.k)
+
+    def push_block(self, vacancy_pos, candidate_ids, scores):
+        # scores: matriz (vagas do bloco x candidatos do lote).
+        # Linhas negativas (vagas que o ranker não acompanha) são descartadas, como em push().
+        vacancy_pos = np.asarray(vacancy_pos)
+        scores = np.asarray(scores, dtype=np.float32).reshape(len(vacancy_pos), -1)
+        known = vacancy_pos >= 0
+        if not known.any():
+            return self
+        vacancy_pos, scores = vacancy_pos[known], scores[known]
+        candidates = np.broadcast_to(np.asarray(candidate_ids, dtype=np.int64), scores.shape)
+        self._merge(vacancy_pos, scores, candidates)
+        return self
+
+    def push(self, vacancy_ids, candidate_ids, scores):
+        # Pares soltos (vaga, candidato, score), como os prospects pontuados.
+        vacancy_pos = self.vacancy_index.get_indexer(np.asarray(vacancy_ids))
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        scores = np.asarray(scores, dtype=np.float32)
+        known = vacancy_pos >= 0
+        vacancy_pos, candidate_ids, scores = vacancy_pos[known], candidate_ids[known], scores[known]
+        if not len(scores):
+            return self
+
+        # Ordena por vaga e score decrescente e guarda só as k primeiras posições de cada vaga.
+        order = np.lexsort((-scores, vacancy_pos))
+        vacancy_pos, candidate_ids, scores = vacancy_pos[order], candidate_ids[order], scores[order]
+        rows, starts, counts = np.unique(vacancy_pos, return_index=True, return_counts=True)
+        rank = np.arange(len(scores)) - np.repeat(starts, counts)
+        keep = rank < self.k
+
+        block_scores = np.full((len(rows), self.k), -np.inf, dtype=np.float32)
+        block_candidates = np.full((len(rows), self.k), EMPTY_CANDIDATE, dtype=np.int64)
+        group = np.repeat(np.arange(len(rows)), counts)[keep]
+        block_scores[group, rank[keep]] = scores[keep]
+        block_candidates[group, rank[keep]] = candidate_ids[keep]
+        self._merge(rows, block_scores, block_candidates)
+        return self
+
+    def rank_store(self, store, vacancy_batch=64, candidate_batch=None):
+        # Pontua, em blocos vagas x candidatos, os pares das vagas que o ranker acompanha e
+        # que existem no PairFeatureStore; as demais vagas do store não são pontuadas.
+        n_candidates = len(store.candidate_ids)
+        candidate_batch = candidate_batch or n_candidates
+        store_pos = store.vacancy_positions(self.vacancy_ids)
+        tracked = np.flatnonzero(store_pos >= 0)
+        for vacancy_start in range(0, len(tracked), vacancy_batch):
+            rows = tracked[vacancy_start:vacancy_start + vacancy_batch]
+            vacancy_pos = store_pos[rows]
+            for candidate_start in range(0, n_candidates, candidate_batch):
+                candidate_pos = np.arange(candidate_start, min(candidate_start + candidate_batch, n_candidates))
+                scores = store.score_pairs(np.tile(candidate_pos, len(vacancy_pos)), np.repeat(vacancy_pos, len(candidate_pos)))
+                self.push_block(rows, store.candidate_ids[candidate_pos], scores)
+        return self
+
+    def rank_shortlists(self, store, candidate_index, vacancies, **query):
+        # Pontua apenas a lista curta de cada vaga, filtrada pelo CandidateIndex.
+        for _, vacancy in vacancies.iterrows():
+            row = self.vacancy_index.get_indexer([vacancy['vacancy_id']])
+            if row[0] < 0:
+                continue
+            candidate_ids = candidate_index.shortlist(vacancy, **query)
+            candidate_pos = store.candidate_positions(candidate_ids)
+            candidate_pos = candidate_pos[candidate_pos >= 0]
+            vacancy_pos = store.vacancy_positions([vacancy['vacancy_id']])[0]
+            if vacancy_pos < 0 or not len(candidate_pos):
+                continue
+            scores = store.score_pairs(candidate_pos, vacancy_pos)
+            self.push_block(row, store.candidate_ids[candidate_pos], scores)
+        return self
+
+    def top_k(self, vacancy_id, k=None):
+        k = min(k or self.k, self.k)
+        row = self.vacancy_index.get_loc(vacancy_id)
+        order = np.argsort(-self.scores[row], kind='stable')[:k]
+        ranked = pd.DataFrame({'candidate_id': self.candidates[row, order], 'approval_probability': self.scores[row, order]})
+        return ranked[ranked['candidate_id'] != EMPTY_CANDIDATE].reset_index(drop=True)
+
+    def to_frame(self, k=None):
+        k = min(k or self.k, self.k)
+        order = np.argsort(-self.scores, axis=1, kind='stable')[:, :k]
+        scores = np.take_along_axis(self.scores, order, axis=1)
+        candidates = np.take_along_axis(self.candidates, order, axis=1)
+        ranked = pd.DataFrame({
+            'vacancy_id': np.repeat(self.vacancy_ids, k),
+            'rank': np.tile(np.arange(1, k + 1), len(self.vacancy_ids)),
+            'candidate_id': candidates.ravel(),
+            'approval_probability': scores.ravel(),
+        })
+        return ranked[ranked['candidate_id'] != EMPTY_CANDIDATE].reset_index(drop=True)
+
+    def export(self, path, k=None):
+        ranked = self.to_frame(k)
+        if path.endswith('.parquet'):
+            ranked.to_parquet(path, index=False)
+        else:
+            ranked.to_csv(path, index=False)
+        return ranked
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def _sort_by_group(y_true, y_score, groups):
+    y_true = np.asarray(y_true).astype(bool)
+    y_score = np.asarray(y_score, dtype=np.float64)
+    if groups is None:
+        codes = np.zeros(len(y_true), dtype=np.int64)
+    else:
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+
+    order = np.lexsort((-y_score, codes))
+    codes, relevant = codes[order], y_true[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.empty(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, len(codes)])
+    ranks = np.arange(len(codes)) - np.repeat(starts, sizes)
+    return codes, relevant, ranks, starts
+
+
+# Precision@K, Recall@K e NDCG@K para K=1..max_k e MAP numa única passada.
+# Com groups (ex.: id da vaga) cada grupo é ranqueado separadamente e as métricas
+# são a média entre os grupos; sem groups há um único ranking global.
+def ranking_metrics(y_true, y_score, groups=None, max_k=1000):
+    codes, relevant, ranks, starts = _sort_by_group(y_true, y_score, groups)
+    n_groups = len(starts)
+    ks = np.arange(1, max_k + 1)
+
+    positives = np.bincount(codes, weights=relevant, minlength=n_groups)
+    has_positives = positives > 0
+    n_positive_groups = max(int(has_positives.sum()), 1)
+
+    top = relevant & (ranks < max_k)
+    top_ranks = ranks[top]
+
+    hits = np.bincount(top_ranks, minlength=max_k).cumsum()
+    precision = hits / (max(n_groups, 1) * ks)
+
+    recall_weights = 1.0 / positives[codes[top]]
+    recall = np.bincount(top_ranks, weights=recall_weights, minlength=max_k).cumsum() / n_positive_groups
+
+    discounts = 1.0 / np.log2(np.arange(max_k) + 2)
+    ndcg = np.zeros(max_k)
+    group_positives = positives[codes[top]]
+    for n_relevant in np.unique(positives[has_positives]):
+        same = group_positives == n_relevant
+        dcg = np.bincount(top_ranks[same], weights=discounts[top_ranks[same]], minlength=max_k).cumsum()
+        ideal = np.cumsum(discounts * (np.arange(max_k) < n_relevant))
+        ndcg += dcg / ideal
+    ndcg /= n_positive_groups
+
+    cumulative = np.cumsum(relevant)
+    before_group = np.r_[0, cumulative][starts][codes]
+    hits_in_group = cumulative - before_group
+    precision_at_hit = np.where(relevant, hits_in_group / (ranks + 1), 0.0)
+    average_precision = np.bincount(codes, weights=precision_at_hit, minlength=n_groups)
+    mean_average_precision = float((average_precision[has_positives] / positives[has_positives]).mean()) if has_positives.any() else 0.0
+
+    return {
+        "k": ks,
+        "precision": precision,
+        "recall": recall,
+        "ndcg": ndcg,
+        "map": mean_average_precision,
+        "base_rate": float(relevant.mean()) if len(relevant) else 0.0,
+        "n_groups": n_groups,
+    }
@@ -0,0 +1,175 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.utils.feature_engineering import FeatureEngineer
+from app.utils.instrumentation import NULL_TIMER
+
+ARTIFACT_FILE = "pipeline.joblib"
+FEATURE_ENGINEER_FILE = "feature_engineer.joblib"
+TEXT_FEATURES_FILE = "text_features.joblib"
+# RandomForest aceita CSR, mas é bem mais lento nela do que numa matriz densa.
+DENSE_ONLY_MODELS = ("RandomForest",)
+
+
+def _window_view(data, sequence_length):
+    # sequence_length=0 usa cada linha isoladamente (necessário para pontuar pares avulsos).
+    if not sequence_length:
+        return data
+    # Cada linha da janela é uma view de data[i:i+sequence_length] achatada, sem cópia.
+    n_windows = max(len(data) - sequence_length, 0)
+    width = sequence_length * data.shape[1]
+    flat = data.reshape(-1)
+    if n_windows == 0 or width == 0:
+        return np.empty((n_windows, width), dtype=data.dtype)
+    return sliding_window_view(flat, width)[::data.shape[1]][:n_windows]
+
+
+class CandidateScorer:
+    # Só o necessário para carregar o artefato e pontuar: nada de matplotlib, sklearn ou xgboost
+    # no import (o modelo salvo traz o próprio import ao ser carregado). O treino fica em
+    # CandidateModelPipeline (app.utils.predict).
+    def __init__(self):
+        self.model = None
+        self.model_name = None
+        self.feature_engineer = None
+        self.text_features = None
+        self.feature_columns = None
+        self.dropped_columns = []
+        self.target_column = None
+        self.sequence_length = None
+        self.sparse = False
+        self.dtype = np.float32
+        self.negative_rate = 1.0
+        self.calibration_rate = 1.0
+        self.roc_auc = None
+
+    def _accepts_sparse(self, name):
+        return name not in DENSE_ONLY_MODELS
+
+    def _recalibrate(self, proba):
+        # q = p / (p + (1 - p) / r): desfaz o aumento artificial da taxa de positivos.
+        rate = self.calibration_rate
+        if rate >= 1:
+            return proba
+        return proba / (proba + (1 - proba) / rate)
+
+    def _compact_dtype(self, data):
+        integral = np.array_equal(data, np.round(data))
+        if integral and data.size and data.min() >= 0 and data.max() <= np.iinfo(np.uint8).max:
+            return np.uint8
+        return np.float32
+
+    def _as_window_source(self, data, dtype):
+        data = np.asarray(data)
+        if dtype == "auto":
+            dtype = self._compact_dtype(data.astype(np.float64))
+        return np.ascontiguousarray(data, dtype=dtype)
+
+    def _build_windows(self, data, sequence_length):
+        return _window_view(data, sequence_length)
+
+    def _iter_windows(self, data, sequence_length, batch_size, target=None):
+        windows = self._build_windows(data, sequence_length)
+        for start in range(0, windows.shape[0], batch_size):
+            stop = start + batch_size
+            if target is None:
+                yield windows[start:stop]
+            else:
+                yield windows[start:stop], target[sequence_length + start:sequence_length + stop]
+
+    def _build_sparse_windows(self, data, sequence_length):
+        if not sequence_length:
+            return data.tocsr()
+        n_windows = data.shape[0] - sequence_length
+        return sp.hstack([data[i:i + n_windows] for i in range(sequence_length)], format='csr')
+
+    @classmethod
+    def load(cls, models_dir="models"):
+        artifact = joblib.load(os.path.join(models_dir, ARTIFACT_FILE))
+        pipeline = cls()
+        pipeline.model_name = artifact["model_name"]
+        pipeline.model = joblib.load(os.path.join(models_dir, f"{pipeline.model_name}.joblib"))
+        pipeline.feature_columns = artifact["feature_columns"]
+        pipeline.dropped_columns = artifact.get("dropped_columns", [])
+        pipeline.target_column = artifact["target_column"]
+        pipeline.sequence_length = artifact["sequence_length"]
+        pipeline.sparse = artifact.get("sparse", False)
+        pipeline.dtype = np.dtype(artifact.get("dtype", "float32"))
+        pipeline.negative_rate = artifact.get("negative_rate", 1.0)
+        pipeline.calibration_rate = artifact.get("calibration_rate", 1.0)
+        pipeline.roc_auc = artifact.get("roc_auc")
+
+        feature_engineer_path = os.path.join(models_dir, FEATURE_ENGINEER_FILE)
+        if os.path.exists(feature_engineer_path):
+            pipeline.feature_engineer = FeatureEngineer.load(feature_engineer_path)
+        if artifact.get("text_features"):
+            pipeline.text_features = joblib.load(os.path.join(models_dir, TEXT_FEATURES_FILE))
+        return pipeline
+
+    def _add_text_features(self, df, timer=NULL_TIMER):
+        # Modelos treinados com --text-features recalculam a sobreposição de texto de cada par
+        # com os mesmos vetores do treino.
+        if self.text_features is None:
+            return df
+        missing = [col for col in ("candidate_id", "vacancy_id") if col not in df.columns]
+        if missing:
+            raise ValueError(f"O modelo usa features de texto e os dados não têm {', '.join(missing)}.")
+        with timer.stage("text_features", rows=len(df)):
+            return self.text_features.add_features(df)
+
+    def _window_source(self, df, timer=NULL_TIMER):
+        df = self._add_text_features(df, timer)
+        if self.feature_engineer is not None:
+            df = self.feature_engineer.transform(df, timer=timer)
+        return self._as_window_source(df.reindex(columns=self.feature_columns, fill_value=0).values, self.dtype)
+
+    def _design_matrix(self, df, timer=NULL_TIMER):
+        if self.sparse:
+            df = self._add_text_features(df, timer)
+            X, feature_names = self.feature_engineer.transform(df, sparse=True, timer=timer)
+            positions = {name: i for i, name in enumerate(feature_names)}
+            with timer.stage("windowing", rows=X.shape[0]):
+                X = self._build_sparse_windows(X[:, [positions[col] for col in self.feature_columns]], self.sequence_length)
+                return X if self._accepts_sparse(self.model_name) else X.toarray()
+        data = self._window_source(df, timer)
+        with timer.stage("windowing", rows=len(data)):
+            return self._build_windows(data, self.sequence_length)
+
+    def _labels(self, df):
+        if self.target_column in df.columns:
+            return df[self.target_column].astype(int)
+        if 'prospect_candidate_status' in df.columns:
+            return (df['prospect_candidate_status'] == 'Aprovado').astype(int)
+        return None
+
+    def predict_proba(self, df, batch_size=None, timer=NULL_TIMER):
+        if self.model is None:
+            raise RuntimeError("Nenhum modelo treinado: execute run() ou load() antes de predict_proba().")
+        n_rows = max(len(df) - (self.sequence_length or 0), 0)
+        if batch_size is not None and not self.sparse:
+            data = self._window_source(df, timer)
+            with timer.stage(f"predict:{self.model_name}", rows=n_rows):
+                batches = self._iter_windows(data, self.sequence_length, batch_size)
+                scores = np.concatenate([self.model.predict_proba(X)[:, 1] for X in batches] or [np.empty(0)])
+            return pd.Series(self._recalibrate(scores), index=df.index[self.sequence_length:])
+        X = self._design_matrix(df, timer)
+        with timer.stage(f"predict:{self.model_name}", rows=n_rows):
+            scores = self.model.predict_proba(X)[:, 1]
+        return pd.Series(self._recalibrate(scores), index=df.index[self.sequence_length:])
+
+    def score(self, df, batch_size=None, timer=NULL_TIMER):
+        scores = self.predict_proba(df, batch_size=batch_size, timer=timer)
+        with timer.stage("ranking", rows=len(scores)):
+            candidate_ids = df.loc[scores.index, 'candidate_id'].values if 'candidate_id' in df.columns else scores.index
+            ranked = pd.DataFrame({'candidate_id': candidate_ids, 'approval_probability': scores.values}, index=scores.index)
+
+            labels = self._labels(df)
+            if labels is not None:
+                ranked['approved'] = labels.loc[scores.index]
+
+            return ranked.sort_values(by='approval_probability', ascending=False)
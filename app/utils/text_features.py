@@ -0,0 +1,142 @@
+import argparse
+import logging
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from app.utils.data_store import PROCESSED_DIR
+from app.utils.ingestion import JsonObjectStream, _get
+
+CANDIDATE_TEXT_FIELDS = (
+    ('informacoes_profissionais', 'titulo_profissional'),
+    ('informacoes_profissionais', 'area_atuacao'),
+    ('informacoes_profissionais', 'conhecimentos_tecnicos'),
+    ('informacoes_profissionais', 'certificacoes'),
+    ('cv_pt',),
+)
+
+VACANCY_TEXT_FIELDS = (
+    ('informacoes_basicas', 'titulo_vaga'),
+    ('perfil_vaga', 'areas_atuacao'),
+    ('perfil_vaga', 'principais_atividades'),
+    ('perfil_vaga', 'competencia_tecnicas_e_comportamentais'),
+)
+
+TEXT_FEATURES = ('text_similarity', 'text_skill_coverage')
+TEXT_FEATURES_FILE = os.path.join(PROCESSED_DIR, "text_features.joblib")
+
+# Mantém tokens como c++, c#, node.js e sql2019 inteiros.
+TOKEN_PATTERN = r"(?u)\b[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|\b[a-z0-9]\b[+#]*"
+STOP_WORDS = [
+    'a', 'o', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na', 'nos', 'nas', 'com', 'para', 'por', 'um', 'uma',
+    'os', 'as', 'ao', 'aos', 'que', 'se', 'ou', 'como', 'mais', 'sobre', 'entre', 'sua', 'seu', 'suas', 'seus',
+    'and', 'the', 'of', 'to', 'in', 'for', 'with', 'on', 'at', 'an', 'or', 'is', 'as', 'by',
+]
+
+
+def _record_text(record, fields):
+    parts = (_get(record, field) for field in fields)
+    return ' '.join(part if isinstance(part, str) else ' '.join(map(str, part)) for part in parts if part)
+
+
+class TextFeatures:
+    # Textos de currículos e requisitos de vagas viram vetores binários por hashing (sem
+    # vocabulário em memória). Só os buckets presentes em alguma vaga são guardados para os
+    # candidatos, já que os demais nunca contribuem para a sobreposição.
+    def __init__(self, n_features=2 ** 20, batch_size=2000):
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.candidate_ids = None
+        self.candidates = None
+        self.vacancy_ids = None
+        self.vacancies = None
+
+    def _vectorizer(self):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        return HashingVectorizer(n_features=self.n_features, token_pattern=TOKEN_PATTERN, strip_accents='unicode',
+                                 stop_words=STOP_WORDS, alternate_sign=False, norm=None, binary=True, dtype=np.float32)
+
+    def hash_records(self, records, fields, mask=None):
+        vectorizer = self._vectorizer()
+        ids, blocks, texts = [], [], []
+
+        def flush():
+            block = vectorizer.transform(texts)
+            if mask is not None:
+                block.data[~mask[block.indices]] = 0
+                block.eliminate_zeros()
+            blocks.append(block)
+            texts.clear()
+
+        for record_id, record in records:
+            ids.append(int(record_id))
+            texts.append(_record_text(record, fields))
+            if len(texts) >= self.batch_size:
+                flush()
+        if texts:
+            flush()
+        matrix = sp.vstack(blocks, format='csr') if blocks else sp.csr_matrix((0, self.n_features), dtype=np.float32)
+        return np.array(ids, dtype=np.int64), matrix
+
+    def fit(self, candidates_path, vacancies_path):
+        self.vacancy_ids, self.vacancies = self.hash_records(JsonObjectStream(vacancies_path), VACANCY_TEXT_FIELDS)
+        mask = np.zeros(self.n_features, dtype=bool)
+        mask[self.vacancies.indices] = True
+        self.candidate_ids, self.candidates = self.hash_records(JsonObjectStream(candidates_path), CANDIDATE_TEXT_FIELDS, mask)
+        logging.info(f"Texto: {len(self.vacancy_ids)} vagas ({self.vacancies.nnz} tokens) e {len(self.candidate_ids)} "
+                     f"candidatos ({self.candidates.nnz} tokens em comum com as vagas)")
+        return self
+
+    def overlap(self, candidate_ids, vacancy_ids):
+        # Produto escalar linha a linha entre os vetores binários do par, em lotes: tokens em
+        # comum, normalizados pelo cosseno e pela quantidade de tokens da vaga.
+        candidate_pos = pd.Index(self.candidate_ids).get_indexer(np.asarray(candidate_ids, dtype=np.int64))
+        vacancy_pos = pd.Index(self.vacancy_ids).get_indexer(np.asarray(vacancy_ids, dtype=np.int64))
+        known = np.flatnonzero((candidate_pos >= 0) & (vacancy_pos >= 0))
+        candidate_sizes = np.diff(self.candidates.indptr)
+        vacancy_sizes = np.diff(self.vacancies.indptr)
+
+        similarity = np.zeros(len(candidate_pos), dtype=np.float32)
+        coverage = np.zeros(len(candidate_pos), dtype=np.float32)
+        for start in range(0, len(known), self.batch_size * 10):
+            rows = known[start:start + self.batch_size * 10]
+            ci, vi = candidate_pos[rows], vacancy_pos[rows]
+            shared = np.asarray(self.candidates[ci].multiply(self.vacancies[vi]).sum(axis=1)).ravel()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                similarity[rows] = np.nan_to_num(shared / np.sqrt(candidate_sizes[ci] * vacancy_sizes[vi]))
+                coverage[rows] = np.nan_to_num(shared / vacancy_sizes[vi])
+        return {'text_similarity': similarity, 'text_skill_coverage': coverage}
+
+    def add_features(self, df):
+        scores = self.overlap(df['candidate_id'].to_numpy(), df['vacancy_id'].to_numpy())
+        return df.assign(**scores)
+
+    def save(self, path=TEXT_FEATURES_FILE):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=TEXT_FEATURES_FILE):
+        return joblib.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os vetores de texto (hashing) de candidatos e vagas a partir dos JSON brutos.")
+    parser.add_argument("--raw-dir", default="data/raw")
+    parser.add_argument("--output", default=TEXT_FEATURES_FILE)
+    parser.add_argument("--n-features", type=int, default=2 ** 20)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    text_features = TextFeatures(args.n_features, args.batch_size).fit(
+        os.path.join(args.raw_dir, "candidates.json"), os.path.join(args.raw_dir, "vacancies.json"))
+    text_features.save(args.output)
+    logging.info(f"Vetores de texto salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
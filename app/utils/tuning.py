@@ -0,0 +1,194 @@
+import itertools
+import logging
+import math
+import os
+import tempfile
+import time
+from multiprocessing import TimeoutError as PoolTimeoutError
+from multiprocessing import get_context
+from multiprocessing.pool import ThreadPool
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+
+PARAM_SPACES = {
+    "XGBoost": {
+        "max_depth": [3, 4, 6, 8],
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.6, 0.8, 1.0],
+        "min_child_weight": [1, 5, 10],
+    },
+    "RandomForest": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [None, 10, 20],
+        "min_samples_leaf": [1, 5, 20],
+        "max_features": ["sqrt", "log2"],
+    },
+    "LogisticRegression": {
+        "C": [0.01, 0.1, 1.0, 10.0],
+    },
+}
+
+# Teto de árvores do XGBoost; o early stopping decide quantas são de fato usadas.
+MAX_BOOSTING_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 30
+
+
+def _fit_config(model, data, subset, densify, boosting):
+    # data é a tupla (X_train, y_train, X_valid, y_valid) ou, em processos, o caminho do
+    # arquivo joblib aberto como memmap, para que a matriz não seja copiada por configuração.
+    if isinstance(data, str):
+        data = joblib.load(data, mmap_mode="r")
+    X_train, y_train, X_valid, y_valid = data
+    X_train, y_train = X_train[subset], y_train[subset]
+    if densify:
+        X_train, X_valid = X_train.toarray(), X_valid.toarray()
+    start = time.perf_counter()
+    if boosting:
+        model.fit(X_train, y_train, eval_set=[(X_valid, y_valid)], verbose=False)
+    else:
+        model.fit(X_train, y_train)
+    score = roc_auc_score(y_valid, model.predict_proba(X_valid)[:, 1])
+    n_estimators = model.best_iteration + 1 if boosting else getattr(model, "n_estimators", None)
+    return score, n_estimators, time.perf_counter() - start
+
+
+class HyperparameterSearch:
+    # Successive halving separado para cada modelo: a cada rodada as configurações restantes
+    # do modelo treinam com factor vezes mais linhas e fica o melhor 1/factor pelo AUC de
+    # validação. As rodadas dos modelos andam juntas e as configurações rodam em paralelo
+    # (uma thread/núcleo cada) dentro de um orçamento total de tempo.
+    def __init__(self, n_candidates=8, factor=3, min_resources=1000, time_budget=None, n_jobs=None,
+                 validation_size=0.2, param_spaces=None, random_state=42):
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.min_resources = min_resources
+        self.time_budget = time_budget
+        self.n_jobs = n_jobs
+        self.validation_size = validation_size
+        self.param_spaces = param_spaces or PARAM_SPACES
+        self.random_state = random_state
+        self.leaderboard = None
+        self.best_params = {}
+
+    def _candidates(self, models):
+        families = []
+        for entry in models:
+            space = self.param_spaces.get(entry["name"])
+            if not space:
+                families.append((entry, [{}]))
+                continue
+            n_configs = min(self.n_candidates, math.prod(len(values) for values in space.values()))
+            families.append((entry, list(ParameterSampler(space, n_configs, random_state=self.random_state))))
+        return families
+
+    def _estimator(self, entry, params):
+        model = clone(entry["model"]).set_params(n_jobs=1, **params)
+        if entry["name"] == "XGBoost":
+            model.set_params(n_estimators=MAX_BOOSTING_ROUNDS, early_stopping_rounds=EARLY_STOPPING_ROUNDS)
+        return model
+
+    def _rung_sizes(self, n_candidates, n_rows):
+        n_rungs = max(int(math.log(max(n_candidates, 1), self.factor)) + 1, 1)
+        sizes = [n_rows // self.factor ** (n_rungs - 1 - rung) for rung in range(n_rungs)]
+        return [max(min(size, n_rows), min(self.min_resources, n_rows)) for size in sizes]
+
+    def _halve(self, pool, families, data, order, densify, deadline):
+        sizes = [self._rung_sizes(len(configs), len(order)) for _, configs in families]
+        survivors = {f: list(range(len(configs))) for f, (_, configs) in enumerate(families)}
+        rows, timed_out, rung = [], False, 0
+        while survivors:
+            # Intercala os modelos para que um orçamento curto não deixe nenhum deles sem avaliação.
+            subsets = {f: np.sort(order[:sizes[f][rung]]) for f in survivors}
+            queue = itertools.zip_longest(*([(f, i) for i in alive] for f, alive in survivors.items()))
+            futures = {}
+            for f, i in (job for group in queue for job in group if job is not None):
+                entry, configs = families[f]
+                futures[f, i] = pool.apply_async(_fit_config, (self._estimator(entry, configs[i]), data, subsets[f],
+                                                               densify and not entry["accepts_sparse"], entry["name"] == "XGBoost"))
+
+            scores = {f: {} for f in survivors}
+            for (f, i), future in futures.items():
+                timeout = max(deadline - time.monotonic(), 0) if deadline else None
+                try:
+                    score, n_estimators, seconds = future.get(timeout=timeout)
+                except PoolTimeoutError:
+                    timed_out = True
+                    continue
+                entry, configs = families[f]
+                scores[f][i] = score
+                rows.append({"model": entry["name"], "params": configs[i], "rung": rung, "n_rows": sizes[f][rung],
+                             "roc_auc": score, "n_estimators": n_estimators, "fit_seconds": seconds})
+
+            logging.info(f"Rodada {rung}: " + ", ".join(f"{families[f][0]['name']} {len(scores[f])}/{len(alive)} "
+                                                        f"com {sizes[f][rung]} linhas" for f, alive in survivors.items()))
+            if timed_out or (deadline and time.monotonic() >= deadline):
+                logging.warning(f"Orçamento de {self.time_budget}s esgotado na rodada {rung}")
+                break
+
+            remaining = {}
+            for f, family_scores in scores.items():
+                if not family_scores or rung + 1 >= len(sizes[f]):
+                    continue
+                keep = max(len(family_scores) // self.factor, 1)
+                # Uma única configuração restante só segue para o XGBoost, cujo número de
+                # árvores precisa vir do early stopping no treino completo.
+                if keep == 1 and families[f][0]["name"] != "XGBoost":
+                    continue
+                remaining[f] = sorted(family_scores, key=family_scores.get, reverse=True)[:keep]
+            survivors = remaining
+            rung += 1
+        return rows
+
+    def fit(self, models, X, y):
+        X_train, X_valid, y_train, y_valid = train_test_split(X, y, test_size=self.validation_size, stratify=y,
+                                                              random_state=self.random_state)
+        order = np.random.default_rng(self.random_state).permutation(X_train.shape[0])
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        n_workers = self.n_jobs or os.cpu_count() or 1
+
+        with tempfile.TemporaryDirectory() as temp_folder:
+            if deadline:
+                # Com orçamento, cada configuração roda num processo (spawn, seguro com as threads
+                # OpenMP do XGBoost), e terminate() encerra os fits que passarem do prazo; threads
+                # não podem ser interrompidas e continuariam ocupando os núcleos.
+                data = os.path.join(temp_folder, "split.joblib")
+                joblib.dump((X_train, y_train, X_valid, y_valid), data)
+                pool = get_context("spawn").Pool(n_workers)
+            else:
+                data = (X_train, y_train, X_valid, y_valid)
+                pool = ThreadPool(n_workers)
+            try:
+                rows = self._halve(pool, self._candidates(models), data, order, sp.issparse(X_train), deadline)
+            finally:
+                pool.terminate()
+                pool.join()
+
+        columns = ["model", "params", "rung", "n_rows", "roc_auc", "n_estimators", "fit_seconds"]
+        self.leaderboard = pd.DataFrame(rows, columns=columns).sort_values(["n_rows", "roc_auc"], ascending=[False, False]).reset_index(drop=True)
+        # Melhor configuração de cada modelo na maior amostra que ele alcançou.
+        for name, group in self.leaderboard.groupby("model", sort=False):
+            best = group.iloc[0]
+            self.best_params[name] = dict(best["params"])
+            if name == "XGBoost":
+                if best["n_rows"] == X_train.shape[0]:
+                    self.best_params[name]["n_estimators"] = int(best["n_estimators"])
+                else:
+                    logging.warning("XGBoost não chegou ao treino completo; mantido o número de árvores padrão")
+        return self
+
+    def best_estimator(self, entry):
+        # Estimador final (sem early stopping) com a melhor configuração encontrada.
+        params = self.best_params.get(entry["name"])
+        if params is None:
+            return entry["model"]
+        model = clone(entry["model"]).set_params(**params)
+        if entry["name"] == "XGBoost":
+            model.set_params(early_stopping_rounds=None)
+        return model
@@ -0,0 +1,39 @@
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.candidate_index import CandidateIndex
+from app.utils.data_store import PROCESSED_DIR, load_processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de consulta do índice invertido de candidatos.")
+    parser.add_argument("--processed-dir", default=PROCESSED_DIR)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--min-soft", type=int, default=2)
+    parser.add_argument("--hard", nargs="*", default=["region"])
+    parser.add_argument("--allow-missing", action="store_true")
+    args = parser.parse_args()
+
+    candidates = load_processed("candidates", args.processed_dir)
+    vacancies = load_processed("vacancies", args.processed_dir)
+
+    start = time.perf_counter()
+    index = CandidateIndex(candidates)
+    print(f"índice com {index.size} candidatos construído em {time.perf_counter() - start:.2f}s")
+
+    rows = vacancies.sample(min(args.queries, len(vacancies)), random_state=42).to_dict("records")
+    sizes = np.empty(len(rows), dtype=np.int64)
+    start = time.perf_counter()
+    for i, vacancy in enumerate(rows):
+        sizes[i] = len(index.query(vacancy, hard=args.hard, min_soft=args.min_soft, allow_missing=args.allow_missing))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(rows)} consultas: {elapsed / len(rows) * 1e6:.0f} µs por vaga")
+    print(f"lista curta: média {sizes.mean():.0f}, p50 {np.median(sizes):.0f}, máx {sizes.max()} "
+          f"({sizes.mean() / index.size:.1%} dos candidatos pontuados)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from app.utils.correlation import CorrelationFilter
+
+
+def columns_to_drop_dense(df, threshold=0.9):
+    # Regra original do pipeline, com a matriz inteira em memória.
+    corr = df.corr()
+    upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
+    return [col for col in upper.columns if any(upper[col] > threshold)]
+
+
+def make_frame(n, seed=0):
+    # Colunas comuns, uma constante não nula, uma quase constante, quase duplicatas e one-hot.
+    rng = np.random.default_rng(seed)
+    a = rng.normal(size=n)
+    df = pd.DataFrame({
+        'a': a,
+        'b': rng.normal(size=n),
+        'constant': np.full(n, 5.5),
+        'near_constant': 1e6 + rng.normal(scale=1e-7, size=n),
+        'a_copy': a + rng.normal(scale=1e-3, size=n),
+        'a_shifted': 1e4 + a,
+        'a_negated': -a,
+        'flag': (rng.random(n) < 0.999).astype(float),
+    })
+    df['flag_copy'] = df['flag']
+    return df
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o filtro de correlação por blocos com df.corr().")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'df.corr (s)':>12} {'chunked (s)':>12} {'dropped':>40}")
+    for n in args.sizes:
+        df = make_frame(n)
+        dense_time, expected = _timed(lambda: columns_to_drop_dense(df, args.threshold))
+        chunked_time, dropped = _timed(
+            lambda: CorrelationFilter(args.threshold).fit(df, chunk_size=args.chunk_size).columns_to_drop())
+        sparse_dropped = CorrelationFilter(args.threshold).fit(
+            sp.csr_matrix(df.to_numpy()), list(df.columns), chunk_size=args.chunk_size).columns_to_drop()
+        for name, result in (("denso", dropped), ("esparso", sparse_dropped)):
+            if result != expected:
+                raise AssertionError(f"Colunas descartadas divergentes ({name}) para {n} linhas: {result} != {expected}")
+        print(f"{n:>10} {dense_time:>12.3f} {chunked_time:>12.3f} {', '.join(dropped):>40}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# Módulos que a página de pontuação não deve carregar no import.
+HEAVY_MODULES = ("matplotlib", "seaborn", "sklearn", "xgboost", "imblearn", "tensorflow", "streamlit")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def measure(module, repeat):
+    # Cada medida roda num interpretador novo, senão o segundo import sai do cache de sys.modules.
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)], capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return min(run["seconds"] for run in runs), runs[0]["modules"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de import do caminho de pontuação e falha se passar do orçamento.")
+    parser.add_argument("--module", default="app.utils.scoring")
+    parser.add_argument("--budget", type=float, default=1.0, help="Tempo máximo de import, em segundos.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare", nargs="*", default=["app.utils.predict"], help="Módulos medidos só para referência.")
+    args = parser.parse_args()
+
+    for module in args.compare:
+        seconds, _ = measure(module, args.repeat)
+        print(f"{module:<28} {seconds:>6.2f}s (referência)")
+
+    seconds, modules = measure(args.module, args.repeat)
+    heavy = [name for name in HEAVY_MODULES if name in modules]
+    print(f"{args.module:<28} {seconds:>6.2f}s (orçamento {args.budget:.2f}s)")
+
+    failed = False
+    if seconds > args.budget:
+        print(f"{args.module} passou do orçamento de import: {seconds:.2f}s > {args.budget:.2f}s")
+        failed = True
+    if heavy:
+        print(f"{args.module} carrega módulos de treino/plot no import: {', '.join(heavy)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("Import dentro do orçamento")
+
+
+if __name__ == "__main__":
+    main()
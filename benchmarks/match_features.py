@@ -0,0 +1,52 @@
+import argparse
+import time
+
+import numpy as np
+
+from app.utils.feature_engineering import SP_DDDS, FeatureEngineer
+from benchmarks.synthetic import make_prospects
+
+MATCH_COLUMNS = ['match_education_level', 'match_english_level', 'match_spanish_level', 'match_pcd', 'mobile_region_match']
+
+
+def add_custom_features_rowwise(fe, df):
+    df['match_education_level'] = df.apply(lambda x: fe.match_exact(x['vacancy_education_level'], x['candidate_academic_level']), axis=1)
+    df['match_english_level'] = df.apply(lambda x: fe.match_exact(x['vacancy_english_level'], x['candidate_english_level']), axis=1)
+    df['match_spanish_level'] = df.apply(lambda x: fe.match_exact(x['vacancy_spanish_level'], x['candidate_spanish_level']), axis=1)
+    df['match_pcd'] = df.apply(lambda x: int(x['vacancy_pcd'] == 'Sim' and x['candidate_pcd'] == 'Sim'), axis=1)
+    df['mobile_region_match'] = df.apply(lambda x: int(str(x['vacancy_region']).lower() == 'são paulo' and str(x['candidate_ddd_mobile']) in SP_DDDS), axis=1)
+    return df
+
+
+def _timed(fn, df):
+    start = time.perf_counter()
+    out = fn(df.copy())
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os match_* por linha (df.apply) com a versão vetorizada.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 500_000, 5_000_000])
+    parser.add_argument("--skip-rowwise-above", type=int, default=None,
+                        help="Não executa a versão df.apply acima deste número de linhas.")
+    args = parser.parse_args()
+
+    fe = FeatureEngineer()
+    print(f"{'rows':>10} {'row-wise (s)':>14} {'vectorized (s)':>15} {'speedup':>9}")
+    for n in args.sizes:
+        df = make_prospects(n)
+        vec_time, vec_out = _timed(fe.add_custom_features, df)
+
+        if args.skip_rowwise_above is not None and n > args.skip_rowwise_above:
+            print(f"{n:>10} {'-':>14} {vec_time:>15.3f} {'-':>9}")
+            continue
+
+        row_time, row_out = _timed(lambda d: add_custom_features_rowwise(fe, d), df)
+        for col in MATCH_COLUMNS:
+            if not np.array_equal(vec_out[col].to_numpy(), row_out[col].to_numpy()):
+                raise AssertionError(f"Resultado divergente em {col} para {n} linhas")
+        print(f"{n:>10} {row_time:>14.3f} {vec_time:>15.3f} {row_time / vec_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+
+import numpy as np
+
+from app.serve import ScoringService
+from app.train import train
+from app.utils.predict import CandidateModelPipeline
+from benchmarks.synthetic import make_prospects
+
+
+async def _request(reader, writer, row):
+    body = json.dumps({"rows": [row]}).encode()
+    writer.write(f"POST /score HTTP/1.1\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    headers = {}
+    await reader.readline()
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return json.loads(await reader.readexactly(int(headers["content-length"])))
+
+
+async def _client(port, rows, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for row in rows:
+        start = time.perf_counter()
+        await _request(reader, writer, row)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def _run(pipeline, rows, clients, max_latency, max_batch):
+    service = await ScoringService(pipeline, max_batch=max_batch, max_latency=max_latency).start()
+    server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    latencies = []
+    start = time.perf_counter()
+    async with server:
+        await asyncio.gather(*(_client(port, rows[i::clients], latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    await service.close()
+    return elapsed, np.array(latencies) * 1000, service.metrics()["batch_sizes"]["rows"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede latência e throughput do serviço com e sem micro-batching.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--windows-ms", type=float, nargs="+", default=[0.0, 2.0, 5.0])
+    parser.add_argument("--max-batch", type=int, default=512)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    df = make_prospects(20_000)
+    with tempfile.TemporaryDirectory() as models_dir:
+        train(df, models_dir=models_dir, sequence_length=0)
+        pipeline = CandidateModelPipeline.load(models_dir)
+
+    rows = json.loads(df.sample(args.requests, replace=True, random_state=42).to_json(orient="records", date_format="iso"))
+
+    print(f"{'window (ms)':>11} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9}  batch sizes")
+    for window in args.windows_ms:
+        elapsed, latencies, batch_sizes = asyncio.run(_run(pipeline, rows, args.clients, window / 1000, args.max_batch))
+        print(f"{window:>11.1f} {len(rows) / elapsed:>8.0f} {np.percentile(latencies, 50):>9.2f} "
+              f"{np.percentile(latencies, 99):>9.2f}  {batch_sizes}")
+
+
+if __name__ == "__main__":
+    main()
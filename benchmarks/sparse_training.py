@@ -0,0 +1,53 @@
+import argparse
+import logging
+import tempfile
+import time
+import tracemalloc
+
+from app.utils.feature_engineering import FeatureEngineer
+from app.utils.predict import CandidateModelPipeline
+from benchmarks.synthetic import make_prospects
+
+TARGET_COLUMN = "prospect_candidate_status_Aprovado"
+
+
+def _dense(df, models_dir):
+    feature_engineer = FeatureEngineer()
+    engineered = feature_engineer.fit_transform(df)
+    return CandidateModelPipeline().run(engineered, TARGET_COLUMN, models_dir=models_dir, feature_engineer=feature_engineer)
+
+
+def _sparse(df, models_dir):
+    feature_engineer = FeatureEngineer()
+    X, feature_names = feature_engineer.fit_transform(df, sparse=True)
+    return CandidateModelPipeline().run_sparse(X, feature_names, TARGET_COLUMN, models_dir=models_dir, feature_engineer=feature_engineer)
+
+
+def _measure(fn, df):
+    with tempfile.TemporaryDirectory() as models_dir:
+        tracemalloc.start()
+        start = time.perf_counter()
+        _, ranked = fn(df, models_dir)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return elapsed, peak / 2**20, ranked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara tempo e pico de memória do caminho denso e do esparso.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--sequence-length", type=int, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'rows':>8} {'path':>7} {'time (s)':>9} {'peak (MiB)':>11} {'scored rows':>12}")
+    for n in args.sizes:
+        df = make_prospects(n)
+        for name, fn in (("dense", _dense), ("sparse", _sparse)):
+            elapsed, peak, ranked = _measure(fn, df)
+            print(f"{n:>8} {name:>7} {elapsed:>9.2f} {peak:>11.1f} {len(ranked):>12}")
+
+
+if __name__ == "__main__":
+    main()
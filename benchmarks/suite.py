@@ -0,0 +1,189 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+from datetime import datetime
+
+import numpy as np
+import sklearn
+import xgboost as xgb
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from app.train import TARGET_COLUMN
+from app.utils.feature_engineering import FeatureEngineer
+from app.utils.instrumentation import StageTimer
+from app.utils.predict import CandidateModelPipeline
+from benchmarks.synthetic import make_realistic_prospects
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+BASELINE_FILE = os.path.join(RESULTS_DIR, "baseline.json")
+OUTPUT_FILE = os.path.join(RESULTS_DIR, "latest.json")
+
+
+def _bench_size(n, args, timer):
+    df = make_realistic_prospects(n, seed=args.seed)
+    feature_engineer = FeatureEngineer()
+    pipeline = CandidateModelPipeline(n_jobs=args.n_jobs)
+
+    with timer.stage("preprocess", rows=n):
+        engineered = feature_engineer.preprocess(df.copy(), timer=timer)
+    with timer.stage("correlation_filter", rows=n):
+        engineered = pipeline._remove_high_correlation(engineered)
+    if not args.sequence_length:
+        engineered = engineered.drop(columns=pipeline._label_leaking_columns(TARGET_COLUMN, feature_engineer, engineered.columns))
+    with timer.stage("prepare_ml_data", rows=n):
+        X, y = pipeline._prepare_ml_data(engineered, TARGET_COLUMN, args.sequence_length, dtype=args.dtype)
+
+    # As janelas são views; a cópia de fato acontece ao indexar o treino e o teste.
+    train_pos, test_pos = train_test_split(np.arange(X.shape[0]), test_size=0.2, shuffle=True, random_state=42)
+    with timer.stage("split", rows=X.shape[0]):
+        X_train, X_test, y_train, y_test = X[train_pos], X[test_pos], y[train_pos], y[test_pos]
+
+    quality = {}
+    fitted = {}
+    # Mesmo orçamento de núcleos do pipeline: a regressão logística (lbfgs binário) usa um só,
+    # senão o fit mede basicamente a criação dos processos do loky.
+    budget = pipeline._core_budget()
+    for entry in pipeline.models:
+        if args.models and entry["name"] not in args.models:
+            continue
+        model = clone(entry["model"]).set_params(n_jobs=budget[entry["name"]])
+        with timer.stage(f"fit:{entry['name']}", rows=len(train_pos)):
+            model.fit(X_train, y_train)
+        with timer.stage(f"predict:{entry['name']}", rows=len(test_pos)):
+            proba = model.predict_proba(X_test)[:, 1]
+        quality[entry["name"]] = roc_auc_score(y_test, proba)
+        fitted[entry["name"]] = model
+
+    if fitted:
+        # Ranking ponta a ponta com o melhor modelo: features, janelas, predição e ordenação.
+        pipeline.model_name = max(quality, key=quality.get)
+        pipeline.model = fitted[pipeline.model_name]
+        pipeline.feature_engineer = feature_engineer
+        pipeline.feature_columns = [col for col in engineered.columns if col != TARGET_COLUMN]
+        pipeline.target_column = TARGET_COLUMN
+        pipeline.sequence_length = args.sequence_length
+        pipeline.dtype = X.dtype
+        with timer.stage("end_to_end_ranking", rows=n):
+            pipeline.score(df)
+    return quality
+
+
+def _best_of(runs):
+    # Com --repeat, fica o menor tempo de cada etapa (o menos afetado por ruído).
+    best = {}
+    for records in runs:
+        for record in records:
+            if record["stage"] not in best or record["wall_s"] < best[record["stage"]]["wall_s"]:
+                best[record["stage"]] = record
+    return list(best.values())
+
+
+def _metadata(args):
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "xgboost": xgb.__version__,
+        "sequence_length": args.sequence_length,
+        "dtype": str(args.dtype),
+        "seed": args.seed,
+        "repeat": args.repeat,
+    }
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    reference = {(r["size"], r["stage"]): r["wall_s"] for r in baseline["results"]}
+    regressions = []
+    print(f"{'rows':>9} {'stage':<28} {'wall (s)':>9} {'baseline':>9} {'ratio':>6}")
+    for record in results:
+        base = reference.get((record["size"], record["stage"]))
+        if base is None:
+            continue
+        ratio = record["wall_s"] / base if base > 0 else float("inf")
+        regressed = ratio > 1 + tolerance and record["wall_s"] - base > min_seconds
+        if regressed:
+            regressions.append(record)
+        print(f"{record['size']:>9} {record['stage']:<28} {record['wall_s']:>9.3f} {base:>9.3f} {ratio:>6.2f}"
+              f"{'  REGRESSÃO' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede features, filtro de correlação, janelas, fit/predict de cada modelo "
+                                                 "e ranking ponta a ponta em dados sintéticos, e compara com um baseline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--sequence-length", type=int, default=10)
+    parser.add_argument("--dtype", default="float32", help="dtype da origem das janelas (float32, uint8 ou auto).")
+    parser.add_argument("--models", nargs="+", default=None, help="Restringe os modelos medidos (ex.: XGBoost).")
+    parser.add_argument("--n-jobs", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--trace-memory", action="store_true", help="Pico de memória por etapa via tracemalloc (mais lento).")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados desta execução como o novo baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Aumento relativo de tempo tolerado antes de acusar regressão.")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="Sai com código 2 se não houver baseline (para a CI não passar sem comparar nada).")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Diferenças absolutas menores que isso são ignoradas.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    if args.dtype != "auto":
+        args.dtype = np.dtype(args.dtype)
+
+    results, quality = [], {}
+    for n in args.sizes:
+        runs = []
+        try:
+            for _ in range(args.repeat):
+                timer = StageTimer(trace_memory=args.trace_memory)
+                quality[str(n)] = _bench_size(n, args, timer)
+                timer.stop()
+                runs.append(timer.records)
+                gc.collect()
+        except MemoryError:
+            logging.error(f"Memória insuficiente com {n} linhas; tamanhos maiores foram pulados")
+            break
+        for record in _best_of(runs):
+            results.append({"size": n, **record})
+            print(f"{n:>9} {'  ' * record['depth']}{record['stage']:<28} {record['wall_s']:>9.3f}s "
+                  f"{record['cpu_s']:>9.3f}s CPU {record['rows_per_s'] or 0:>12.0f} linhas/s")
+
+    report = {"metadata": _metadata(args), "results": results, "roc_auc": quality}
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline atualizado em {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        # O baseline depende da máquina e não é versionado: a CI grava o seu com --save-baseline na main.
+        print(f"Sem baseline em {args.baseline}: rode com --save-baseline na main, na mesma máquina, para criar um.")
+        if args.require_baseline:
+            sys.exit(2)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+    if regressions:
+        print(f"{len(regressions)} etapa(s) mais lentas que o baseline (tolerância {args.tolerance:.0%})")
+        sys.exit(1)
+    print("Nenhuma regressão em relação ao baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+LEVELS = ["Fluente", "Avançado", "Intermediário", "Básico", "Nenhum"]
+EDUCATION = ["Ensino Médio", "Ensino Superior Completo", "Pós Graduação Incompleto", "Mestrado", "Doutorado"]
+
+
+def _with_missing(rng, values, rate):
+    values = values.astype(object)
+    values[rng.random(len(values)) < rate] = np.nan
+    return values
+
+
+def make_prospects(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "vacancy_contract_type": rng.choice(["CLT", "PJ"], n),
+        "vacancy_sap": rng.choice(["Sim", "Não"], n),
+        "vacancy_region": rng.choice(["São Paulo", "Pernambuco", "Rio de Janeiro", "Minas Gerais"], n),
+        "vacancy_pcd": rng.choice(["Sim", "Não"], n),
+        "vacancy_professional_level": rng.choice(["Pleno", "Senior", "Junior", "Estágio"], n),
+        "vacancy_education_level": _with_missing(rng, rng.choice(EDUCATION, n), 0.1),
+        "vacancy_english_level": _with_missing(rng, rng.choice(LEVELS, n), 0.1),
+        "vacancy_spanish_level": _with_missing(rng, rng.choice(LEVELS, n), 0.1),
+        "prospect_candidate_status": rng.choice(["Em processo seletivo", "Aprovado", "Reprovado"], n),
+        "prospect_application_date": pd.to_datetime("2021-01-01") + pd.to_timedelta(rng.integers(0, 1095, n), unit="D"),
+        "candidate_ddd_mobile": _with_missing(rng, rng.choice(["11", "21", "31", "41", "51", "61"], n), 0.2),
+        "candidate_pcd": _with_missing(rng, rng.choice(["Sim", "Não"], n), 0.3),
+        "candidate_certifications": rng.choice([0, 1], n),
+        "candidate_academic_level": _with_missing(rng, rng.choice(EDUCATION, n), 0.2),
+        "candidate_english_level": _with_missing(rng, rng.choice([" Básico", "Intermediário ", "avançado", "Nenhum"], n), 0.2),
+        "candidate_spanish_level": _with_missing(rng, rng.choice(["Nenhum", "Básico", "Intermediário", "Avançado"], n), 0.2),
+    })
+
+
+# Distribuições observadas na base unida (vagas x prospects x candidatos); categorias raras
+# ficam de fora e as probabilidades são renormalizadas.
+MISSING = "Nao informado"
+VACANCY_DISTRIBUTIONS = {
+    "vacancy_contract_type": {"CLT": 0.405, "PJ": 0.387, "Hunting": 0.109, "Cooperado": 0.059, MISSING: 0.039},
+    "vacancy_sap": {"Não": 0.964, "Sim": 0.036},
+    "vacancy_region": {"São Paulo": 0.836, "Minas Gerais": 0.045, "Ceará": 0.032, "Rio de Janeiro": 0.026,
+                       "Pernambuco": 0.022, "Paraná": 0.014, "Rio Grande do Sul": 0.008, "Santa Catarina": 0.004,
+                       "Distrito Federal": 0.003},
+    "vacancy_pcd": {"Não": 0.892, MISSING: 0.106, "Sim": 0.002},
+    "vacancy_professional_level": {"Sênior": 0.399, "Analista": 0.326, "Pleno": 0.191, "Júnior": 0.033,
+                                   "Especialista": 0.02, "Assistente": 0.014, "Gerente": 0.009, "Líder": 0.004},
+    "vacancy_education_level": {"Ensino Superior Completo": 0.751, "Ensino Médio Completo": 0.12,
+                                "Ensino Técnico Completo": 0.078, "Ensino Superior Cursando": 0.032,
+                                "Ensino Superior Incompleto": 0.012, "Pós Graduação Completo": 0.004},
+    "vacancy_english_level": {"Básico": 0.331, "Nenhum": 0.249, "Avançado": 0.194, "Fluente": 0.109,
+                              "Intermediário": 0.101, "Técnico": 0.015},
+    "vacancy_spanish_level": {"Nenhum": 0.503, "Básico": 0.387, MISSING: 0.054, "Avançado": 0.02,
+                              "Intermediário": 0.019, "Fluente": 0.016},
+}
+CANDIDATE_DISTRIBUTIONS = {
+    "candidate_ddd_mobile": {"11": 0.56, "21": 0.065, "19": 0.051, "31": 0.043, "85": 0.034, "41": 0.021,
+                             "61": 0.017, "51": 0.015, "81": 0.014, "12": 0.014, "13": 0.012, "15": 0.01},
+    "candidate_pcd": {MISSING: 0.767, "Não": 0.229, "Sim": 0.004},
+    "candidate_certifications": {0: 0.973, 1: 0.027},
+    "candidate_academic_level": {MISSING: 0.735, "Ensino Superior Completo": 0.118, "Pós Graduação Completo": 0.067,
+                                 "Ensino Superior Cursando": 0.028, "Ensino Superior Incompleto": 0.013,
+                                 "Pós Graduação Cursando": 0.011, "Pós Graduação Incompleto": 0.007,
+                                 "Mestrado Completo": 0.006, "Ensino Técnico Completo": 0.004,
+                                 "Ensino Médio Completo": 0.004},
+    "candidate_english_level": {MISSING: 0.747, "Intermediário": 0.088, "Avançado": 0.07, "Básico": 0.062,
+                                "Fluente": 0.026, "Nenhum": 0.007},
+    "candidate_spanish_level": {MISSING: 0.754, "Básico": 0.111, "Nenhum": 0.06, "Intermediário": 0.044,
+                                "Avançado": 0.017, "Fluente": 0.015},
+}
+REJECTED_STATUS = {"Em processo seletivo": 0.82, "Reprovado": 0.12, "Desistiu": 0.06}
+
+
+def _sample(rng, distribution, n):
+    values = np.array(list(distribution), dtype=object)
+    weights = np.array(list(distribution.values()), dtype=float)
+    return values[rng.choice(len(values), n, p=weights / weights.sum())]
+
+
+def _intercept(logits, rate):
+    # Bisseção no intercepto para que a taxa média de aprovação seja exatamente rate.
+    low, high = -20.0, 20.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if (1 / (1 + np.exp(-(logits + middle)))).mean() < rate:
+            low = middle
+        else:
+            high = middle
+    return middle
+
+
+def make_realistic_prospects(n, seed=42, approval_rate=0.05, prospects_per_vacancy=4.3, prospects_per_candidate=1.9):
+    # Vagas e candidatos são sorteados uma vez e reaparecem em vários prospects, como na base real;
+    # a aprovação depende dos matches de idioma, escolaridade e região, com taxa média approval_rate.
+    rng = np.random.default_rng(seed)
+    # Prospects por vaga seguem uma geométrica (mediana 3, máximo 25 na base real).
+    sizes = np.minimum(rng.geometric(1 / prospects_per_vacancy, int(2 * n / prospects_per_vacancy) + 1), 25)
+    while sizes.sum() < n:
+        sizes = np.concatenate([sizes, np.minimum(rng.geometric(1 / prospects_per_vacancy, len(sizes)), 25)])
+    vacancy_id = np.repeat(np.arange(len(sizes)), sizes)[:n]
+    n_vacancies = int(vacancy_id[-1]) + 1 if n else 0
+    n_candidates = max(int(n / prospects_per_candidate), 1)
+    candidate_id = rng.integers(0, n_candidates, n)
+
+    vacancies = pd.DataFrame({col: _sample(rng, dist, n_vacancies) for col, dist in VACANCY_DISTRIBUTIONS.items()})
+    candidates = pd.DataFrame({col: _sample(rng, dist, n_candidates) for col, dist in CANDIDATE_DISTRIBUTIONS.items()})
+    df = pd.concat([vacancies.iloc[vacancy_id].reset_index(drop=True),
+                    candidates.iloc[candidate_id].reset_index(drop=True)], axis=1)
+    df.insert(0, "vacancy_id", vacancy_id)
+    df.insert(1, "candidate_id", candidate_id)
+    df["candidate_certifications"] = df["candidate_certifications"].astype(int)
+
+    logits = (1.2 * (df["vacancy_english_level"] == df["candidate_english_level"])
+              + 0.9 * (df["vacancy_education_level"] == df["candidate_academic_level"])
+              + 0.6 * (df["vacancy_spanish_level"] == df["candidate_spanish_level"])
+              + 0.8 * ((df["vacancy_region"] == "São Paulo") & (df["candidate_ddd_mobile"] == "11"))
+              + 0.7 * df["candidate_certifications"]
+              + rng.normal(0, 1, n)).to_numpy(dtype=float)
+    probability = 1 / (1 + np.exp(-(logits + _intercept(logits, approval_rate))))
+    approved = rng.random(n) < probability
+    df["prospect_candidate_status"] = np.where(approved, "Aprovado", _sample(rng, REJECTED_STATUS, n))
+    df["prospect_application_date"] = pd.to_datetime("2019-01-01") + pd.to_timedelta(rng.integers(0, 2250, n), unit="D")
+    df["prospect_id"] = np.arange(n)
+    return df
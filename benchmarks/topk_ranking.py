@@ -0,0 +1,75 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.utils.ranking import TopKRanker
+
+
+def _scores(vacancy_factors, candidate_factors):
+    # Scores sintéticos de baixo posto, no intervalo (0, 1) como approval_probability.
+    return 1 / (1 + np.exp(-(vacancy_factors @ candidate_factors.T)))
+
+
+def _topk(vacancy_factors, candidate_factors, k, vacancy_batch):
+    ranker = TopKRanker(np.arange(len(vacancy_factors)), k=k)
+    candidate_ids = np.arange(len(candidate_factors))
+    for start in range(0, len(vacancy_factors), vacancy_batch):
+        rows = np.arange(start, min(start + vacancy_batch, len(vacancy_factors)))
+        ranker.push_block(rows, candidate_ids, _scores(vacancy_factors[rows], candidate_factors))
+    return ranker
+
+
+def _full_sort(vacancy_factors, candidate_factors, k):
+    # Caminho atual: uma tabela com todos os pares e sort_values global.
+    scores = _scores(vacancy_factors, candidate_factors)
+    ranked = pd.DataFrame({
+        'vacancy_id': np.repeat(np.arange(len(vacancy_factors)), len(candidate_factors)),
+        'candidate_id': np.tile(np.arange(len(candidate_factors)), len(vacancy_factors)),
+        'approval_probability': scores.ravel(),
+    }).sort_values(['vacancy_id', 'approval_probability'], ascending=[True, False])
+    return ranked.groupby('vacancy_id').head(k)
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o ranking top-K por vaga contra a ordenação global de todos os pares.")
+    parser.add_argument("--candidates", type=int, default=40_000)
+    parser.add_argument("--vacancies", type=int, default=14_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--vacancy-batch", type=int, default=256)
+    parser.add_argument("--baseline-vacancies", type=int, default=200,
+                        help="Vagas usadas na ordenação global (todas as vagas não cabem em memória).")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    candidate_factors = rng.normal(size=(args.candidates, 16)).astype(np.float32) / 4
+    vacancy_factors = rng.normal(size=(args.vacancies, 16)).astype(np.float32) / 4
+
+    print(f"{'path':>10} {'vacancies':>10} {'pairs':>13} {'time (s)':>9} {'peak (MiB)':>11}")
+    elapsed, peak, ranker = _measure(_topk, vacancy_factors, candidate_factors, args.k, args.vacancy_batch)
+    print(f"{'top-k':>10} {args.vacancies:>10} {args.vacancies * args.candidates:>13} {elapsed:>9.2f} {peak:>11.1f}")
+
+    subset = vacancy_factors[:args.baseline_vacancies]
+    elapsed, peak, baseline = _measure(_full_sort, subset, candidate_factors, args.k)
+    print(f"{'full sort':>10} {len(subset):>10} {len(subset) * args.candidates:>13} {elapsed:>9.2f} {peak:>11.1f}")
+
+    expected = baseline.groupby('vacancy_id')['candidate_id'].apply(set)
+    ranked = ranker.to_frame()
+    ranked = ranked[ranked['vacancy_id'] < len(subset)].groupby('vacancy_id')['candidate_id'].apply(set)
+    print(f"top-k igual à ordenação global: {bool((ranked == expected).all())}")
+
+
+if __name__ == "__main__":
+    main()
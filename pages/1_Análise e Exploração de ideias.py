@@ -28,16 +28,13 @@ with st.container():
 
     st.markdown("<hr class='separator'>", unsafe_allow_html=True)
 
-# Abas com o pipeline
-tab0, tab1, tab2, tab3 = st.tabs([
-    "Pré-processamento",
-    "Análise Exploratória",
-    "Feature Engineering",
-    "Treinamento dos Modelos"
-])
-
-# Chamadas dos módulos
-PreProcessingTab(tab0)
-DataExplorationTab(tab1)
-FeatureEngineeringTab(tab2)
-ModelTrainingTab(tab3)
+# Abas com o pipeline: só a etapa escolhida é renderizada (st.tabs montaria as quatro a cada rerun)
+TABS = {
+    "Pré-processamento": PreProcessingTab,
+    "Análise Exploratória": DataExplorationTab,
+    "Feature Engineering": FeatureEngineeringTab,
+    "Treinamento dos Modelos": ModelTrainingTab,
+}
+
+selected = st.radio("Etapa", list(TABS), horizontal=True, label_visibility="collapsed")
+TABS[selected](st.container())
@@ -1,11 +1,23 @@
+import os
+import tempfile
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-from app.utils.feature_engineering import FeatureEngineer
-from app.utils.predict import CandidateModelPipeline  
+from app.utils.instrumentation import NULL_TIMER, StageTimer
+from app.utils.scoring import ARTIFACT_FILE, CandidateScorer
+from app.utils.ranking import TopKRanker
+from app.utils.ranking_metrics import ranking_metrics
+
+MODELS_DIR = "models"
 
 st.set_page_config(page_title="Ranking de Candidatos", layout="wide")
+
+
+@st.cache_resource
+def load_pipeline(models_dir):
+    return CandidateScorer.load(models_dir)
+
 st.title("Ranking Inteligente de Candidatos")
 
 st.markdown("""
@@ -62,6 +74,7 @@ st.download_button("📥 Baixar CSV Exemplo", csv_example, "exemplo_candidatos.c
 st.divider()
 
 use_mock = st.checkbox("Usar dados simulados")
+show_timings = st.checkbox("Medir tempo de cada etapa")
 
 df = None
 
@@ -87,10 +100,13 @@ if use_mock:
         "candidate_spanish_level": np.random.choice(["Nenhum", "Básico", "Intermediário", "Avançado"], n),
     })
 else:
-    uploaded_file = st.file_uploader("📎 Envie um arquivo CSV com os dados dos candidatos", type=["csv"])
+    uploaded_file = st.file_uploader("📎 Envie um arquivo CSV ou Parquet com os dados dos candidatos", type=["csv", "parquet"])
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file, encoding="utf-8")
+            if uploaded_file.name.endswith(".parquet"):
+                df = pd.read_parquet(uploaded_file)
+            else:
+                df = pd.read_csv(uploaded_file, encoding="utf-8")
             if len(df) < 100:
                 st.warning("⚠️ O arquivo deve conter pelo menos 100 candidatos.")
                 df = None
@@ -105,27 +121,65 @@ if df is not None:
 
     with st.spinner("🔄 Processando dados e gerando ranking..."):
         try:
-            engineered_df = FeatureEngineer().preprocess(df)
-
-            target_column = "prospect_candidate_status_Aprovado"
-            if target_column not in engineered_df.columns and "prospect_candidate_status" in engineered_df.columns:
-                engineered_df[target_column] = (engineered_df["prospect_candidate_status"] == "Aprovado").astype(int)
-
-            pipeline = CandidateModelPipeline()
-            model, ranked_candidates = pipeline.run(engineered_df, target_column=target_column, models_dir="models", plot_metrics=True)
-
-            ranked_candidates["status"] = ranked_candidates["approved"].map({1: "Aprovado", 0: "Reprovado"})
+            timer = StageTimer() if show_timings else NULL_TIMER
+            if os.path.exists(os.path.join(MODELS_DIR, ARTIFACT_FILE)):
+                pipeline = load_pipeline(MODELS_DIR)
+                ranked_candidates = pipeline.score(df, timer=timer)
+            else:
+                st.warning(f"⚠️ Nenhum modelo pré-treinado em `{MODELS_DIR}/`. Treinando com os dados enviados; "
+                           "para produção gere o artefato com `python -m app.train`.")
+                # O treino (sklearn, xgboost) só é importado quando não há artefato pronto.
+                from app.train import train
+
+                # Treina nos primeiros 80% e pontua só os 20% finais: métricas calculadas sobre as
+                # linhas do treino sairiam infladas. As linhas anteriores ao corte entram apenas como
+                # contexto das janelas, sem receber score.
+                cut = int(len(df) * 0.8)
+                with tempfile.TemporaryDirectory() as models_dir:
+                    pipeline = train(df.iloc[:cut], models_dir=models_dir, timer=timer)
+                ranked_candidates = pipeline.score(df.iloc[max(cut - pipeline.sequence_length, 0):], timer=timer)
+                st.info(f"Ranking e métricas abaixo consideram apenas as {len(ranked_candidates)} linhas finais, "
+                        "separadas do treino.")
+
+            if timer.records:
+                with st.expander("⏱️ Tempo por etapa"):
+                    timings_df = timer.to_frame()
+                    st.dataframe(timings_df)
+                    fig = px.bar(timings_df[timings_df["depth"] == 0], x="stage", y="wall_s", title="Tempo de parede por etapa (s)")
+                    st.plotly_chart(fig, use_container_width=True)
 
             st.subheader("Ranking dos Candidatos")
-            filtered_df = ranked_candidates[["approval_probability", "status"]]
+            columns = ["approval_probability"]
+            if "approved" in ranked_candidates.columns:
+                ranked_candidates["status"] = ranked_candidates["approved"].map({1: "Aprovado", 0: "Reprovado"})
+                columns.append("status")
+            filtered_df = ranked_candidates[columns].copy()
             filtered_df["approval_probability"] = filtered_df["approval_probability"].apply(lambda x: f"{x * 100:.2f}%")
             st.dataframe(filtered_df.head(20))
 
-            st.subheader("Distribuição de Aprovados e Reprovados")
-            count_df = ranked_candidates["status"].value_counts().reset_index()
-            count_df.columns = ["Status", "Quantidade"]
-            fig = px.bar(count_df, x="Status", y="Quantidade", color="Status", text="Quantidade", title="Resumo do Ranking")
-            st.plotly_chart(fig, use_container_width=True)
+            if {"vacancy_id", "candidate_id"}.issubset(df.columns):
+                st.subheader("Top candidatos por vaga")
+                scored = df.loc[ranked_candidates.index]
+                ranker = TopKRanker(scored["vacancy_id"].unique(), k=20)
+                ranker.push(scored["vacancy_id"], scored["candidate_id"], ranked_candidates["approval_probability"])
+                vacancy_id = st.selectbox("Vaga", ranker.vacancy_ids)
+                top_df = ranker.top_k(vacancy_id)
+                top_df["approval_probability"] = top_df["approval_probability"].apply(lambda x: f"{x * 100:.2f}%")
+                st.dataframe(top_df)
+
+            if "status" in ranked_candidates.columns:
+                st.subheader("Distribuição de Aprovados e Reprovados")
+                count_df = ranked_candidates["status"].value_counts().reset_index()
+                count_df.columns = ["Status", "Quantidade"]
+                fig = px.bar(count_df, x="Status", y="Quantidade", color="Status", text="Quantidade", title="Resumo do Ranking")
+                st.plotly_chart(fig, use_container_width=True)
+
+                metrics = ranking_metrics(ranked_candidates["approved"], ranked_candidates["approval_probability"], max_k=len(ranked_candidates))
+                st.subheader(f"Precision@K - {pipeline.model_name}")
+                precision_df = pd.DataFrame({"K": metrics["k"], "Precision@K": metrics["precision"]})
+                fig = px.line(precision_df, x="K", y="Precision@K", title="Efetividade do Ranking")
+                fig.add_hline(y=metrics["base_rate"], line_dash="dash", line_color="gray", annotation_text="Taxa base de aprovação")
+                st.plotly_chart(fig, use_container_width=True)
 
         except Exception as e:
             st.error(f"Ocorreu um erro durante o processamento: {e}")
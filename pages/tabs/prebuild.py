@@ -0,0 +1,25 @@
+import argparse
+import time
+
+from pages.tabs.analysis.data_exploration import DataExplorationTab
+from pages.tabs.analysis.feature_engineering import FeatureEngineeringTab
+from pages.tabs.analysis.model_training import ModelTrainingTab
+from pages.tabs.analysis.pre_processing import PreProcessingTab
+from pages.tabs.tab import CACHE_DIR, notebook_html
+
+TABS = [PreProcessingTab, DataExplorationTab, FeatureEngineeringTab, ModelTrainingTab]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte os notebooks das abas de análise para HTML antes do deploy.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    for tab in TABS:
+        start = time.perf_counter()
+        notebook_html(tab.notebook_path, cache_dir=args.cache_dir)
+        print(f"{tab.notebook_path}: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,74 @@
+import glob
+import hashlib
+import os
 from abc import ABC, abstractmethod
 
+import streamlit as st
+
+# HTML pré-gerado (python -m pages.tabs.prebuild) fica versionado junto com os notebooks.
+CACHE_DIR = os.path.join("outputs", "notebooks")
+
+# Cache do processo: sobrevive aos reruns do Streamlit e é compartilhado entre sessões.
+_HTML_CACHE = {}
+
+
+def _convert(notebook_path):
+    # Importados só quando é preciso converter; com o cache em disco o app nem carrega o nbconvert.
+    import nbformat
+    from nbconvert import HTMLExporter
+
+    with open(notebook_path, "r", encoding="utf-8") as f:
+        notebook = nbformat.read(f, as_version=4)
+    body, _ = HTMLExporter().from_notebook_node(notebook)
+    return body
+
+
+def notebook_html(notebook_path, cache_dir=CACHE_DIR):
+    # Em memória a chave é caminho + mtime + tamanho; em disco é o hash do conteúdo, que
+    # continua válido depois de um checkout que muda o mtime.
+    stat = os.stat(notebook_path)
+    key = (os.path.abspath(notebook_path), stat.st_mtime_ns, stat.st_size)
+    if key in _HTML_CACHE:
+        return _HTML_CACHE[key]
+
+    with open(notebook_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(notebook_path))[0]
+    cache_path = os.path.join(cache_dir, f"{name}-{digest}.html")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            html = f.read()
+    else:
+        html = _convert(notebook_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(cache_dir, f"{name}-*.html")):
+            os.remove(stale)
+        # Escrita atômica: outra sessão pode estar lendo o mesmo arquivo.
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(temp_path, cache_path)
+
+    _HTML_CACHE[key] = html
+    return html
+
+
 class TabInterface(ABC):
+    notebook_path = None
+
+    def __init__(self, tab):
+        self.tab = tab
+        self.render()
+
+    def notebook_to_html(self, notebook_path):
+        try:
+            return notebook_html(notebook_path)
+        except Exception as e:
+            return f"Error: {e}"
+
+    def render_notebook(self, notebook_path, height=800):
+        st.components.v1.html(self.notebook_to_html(notebook_path), height=height, scrolling=True)
 
     @abstractmethod
-    def render():
-        pass
\ No newline at end of file
+    def render(self):
+        pass